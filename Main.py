@@ -2,8 +2,17 @@ import importlib
 import Import
 importlib.reload(Import)
 from Import import load_race
+import os
+import time
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from f1_data_manager import RaceDataManager, ScheduleDataManager
+from session_cache import SessionCache
+from geometry import rotate
+
+WARM_STAGES = ('session', 'telemetry', 'cache')
 
 def main(year, session_num):
     session = load_race(year=year, session_num=session_num)
@@ -19,16 +28,85 @@ def DrawTrack(lap, circuit_info):
     track = pos.loc[:, ('X', 'Y')]
     track = track._append(track.iloc[0], ignore_index=True)
     track.columns = track.columns.get_level_values(-1)
-    track_angle = circuit_info.rotation / 180 * np.pi
-    rotated_track = rotate(track, angle=track_angle)
-    rotated_track.columns = ["X", "Y"]
+    rotated_track = pd.DataFrame(rotate(track.to_numpy(dtype=float), circuit_info.rotation), columns=["X", "Y"])
     return rotated_track
-    
 
-def rotate(xy, *, angle):
-    rot_mat = np.array([[np.cos(angle), np.sin(angle)],
-                        [-np.sin(angle), np.cos(angle)]])
-    return np.matmul(xy, rot_mat)
+def warm_session(year, round_number, session_type, force=False, n_jobs=1):
+    """Process one session into the replay cache, returns the seconds spent in each stage"""
+    cache = SessionCache(year, round_number, session_type)
+    if force:
+        cache.invalidate()
+
+    marks = {'start': time.perf_counter()}
+    def progress(stage, *args):
+        marks[stage] = time.perf_counter()
+    RaceDataManager(year, round_number, session_type, load=False, n_jobs=n_jobs).load(progress)
+
+    # 'driver' is the last telemetry result, a session without telemetry has no such stage
+    telemetry_end = marks.get('driver', marks['track'])
+    return {'session': marks['track'] - marks['start'],
+            'telemetry': telemetry_end - marks['track'],
+            'cache': marks['done'] - telemetry_end}
+
+
+def warm_sessions(first_year, last_year, session_types, force=False):
+    """(year, round, session_type) of every session that already took place and is not cached yet"""
+    schedule = ScheduleDataManager()
+    now = pd.Timestamp.now(tz='UTC').tz_localize(None)
+    jobs, fresh = [], 0
+    for year in range(first_year, last_year + 1):
+        for event in schedule.load_season(year):
+            dates = {session['name']: session['date'] for session in event['sessions']}
+            for session_type in session_types:
+                date = dates.get(ScheduleDataManager.SESSION_NAMES[session_type])
+                if date is None or pd.Timestamp(date) > now:
+                    continue
+                if not force and SessionCache(year, event['round'], session_type).exists():
+                    fresh += 1
+                    continue
+                jobs.append((year, event['round'], session_type))
+    return jobs, fresh
+
+
+def warm_cache(first_year, last_year, session_types=('R',), workers=2, force=False):
+    """Pre-process whole seasons into the replay cache.
+
+    Every session is cached on its own and marked complete only once written, so an
+    interrupted run resumes where it stopped and sessions already cached are skipped.
+    """
+    jobs, fresh = warm_sessions(first_year, last_year, session_types, force)
+    print(f"{len(jobs)} sessions to process, {fresh} already cached")
+
+    start = time.perf_counter()
+    totals = dict.fromkeys(WARM_STAGES, 0.0)
+    failed = []
+    # Each worker process gets its share of the cores for the telemetry extraction
+    n_jobs = max(1, (os.cpu_count() or 1) // workers)
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = {pool.submit(warm_session, *job, force, n_jobs): job for job in jobs}
+        for done, future in enumerate(as_completed(futures), 1):
+            year, round_number, session_type = futures[future]
+            try:
+                timings = future.result()
+            except Exception as e:
+                failed.append((futures[future], e))
+                print(f"[{done}/{len(jobs)}] {year} round {round_number} {session_type} failed: {e}")
+                continue
+            for stage, seconds in timings.items():
+                totals[stage] += seconds
+            print(f"[{done}/{len(jobs)}] {year} round {round_number} {session_type} in {sum(timings.values()):.1f}s")
+    except KeyboardInterrupt:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+    print(f"Processed {len(jobs) - len(failed)} sessions in {time.perf_counter() - start:.1f}s, {fresh} skipped, {len(failed)} failed")
+    for stage in WARM_STAGES:
+        print(f"  {stage:<10}{totals[stage]:.1f}s")
+    for (year, round_number, session_type), e in failed:
+        print(f"  failed: {year} round {round_number} {session_type} ({e})")
+    return failed
 
 if __name__ == "__main__":
     import argparse
@@ -36,6 +114,13 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Session selection")
     parser.add_argument('--year', type=int, default=2021, help='Session year')
     parser.add_argument('--session', type=int, default=7, help='Session number')
+    parser.add_argument('--warm', type=int, nargs=2, metavar=('FIRST_YEAR', 'LAST_YEAR'), help='Pre-process every session of these seasons into the replay cache')
+    parser.add_argument('--types', nargs='+', default=['R'], choices=list(ScheduleDataManager.SESSION_NAMES), help='Session types to pre-process')
+    parser.add_argument('--workers', type=int, default=2, help='Sessions processed in parallel')
+    parser.add_argument('--force', action='store_true', help='Process sessions that are already cached again')
 
     args = parser.parse_args()
-    main(args.year, args.session)
\ No newline at end of file
+    if args.warm:
+        warm_cache(*args.warm, session_types=args.types, workers=args.workers, force=args.force)
+    else:
+        main(args.year, args.session)
\ No newline at end of file
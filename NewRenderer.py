@@ -1,4 +1,8 @@
 import arcade
+import pyglet
+from arcade.gl import BufferDescription
+from arcade import shape_list
+from pyglet.math import Mat4, Vec3
 import numpy as np
 import Main
 from typing import List, Tuple, Callable, Optional, Union, Literal
@@ -72,10 +76,15 @@ class FontManager:
 
 class Object:
     object_index = 0
+    DIRTY_FLAGS = ('layout', 'content', 'transform')
     def __init__(self, parent: Union['Object', arcade.Window], x, y, width, height, color, visible = True, rescale = True, keep_proportion = False, anchor = 'center', name=None):
         if anchor not in config.ANCHORS:
             raise ValueError(f"Anchor must be one of: {', '.join(config.ANCHORS)}")
         self.parent = parent
+        # Retained mode: what changed since this node was last rendered into a cache
+        self.dirty_flags = set(Object.DIRTY_FLAGS)
+        if isinstance(parent, Object):
+            parent.mark_dirty('content')
         self.obj = Object.object_index
         Object.object_index += 1
 
@@ -126,6 +135,54 @@ class Object:
 
         self.border = False
 
+    @property
+    def color(self):
+        return self._color
+
+    @color.setter
+    def color(self, value):
+        self._color = value
+        self.mark_dirty('content')
+
+    @property
+    def visible(self):
+        return self._visible
+
+    @visible.setter
+    def visible(self, value):
+        self._visible = value
+        self.mark_dirty('content')
+
+    @property
+    def children(self) -> List['Object']:
+        return [fn.__self__ for fn in self.draw_listeners if isinstance(getattr(fn, '__self__', None), Object)]
+
+    def mark_dirty(self, *flags):
+        """Flag this node and tell its ancestors that their content changed"""
+        self.dirty_flags.update(flags)
+        node = self.parent
+        while isinstance(node, Object) and 'content' not in node.dirty_flags:
+            node.dirty_flags.add('content')
+            node = node.parent
+
+    def clear_dirty(self):
+        self.dirty_flags.clear()
+        for child in self.children:
+            child.clear_dirty()
+
+    def get_text_batch(self) -> Optional[pyglet.graphics.Batch]:
+        """Shared text batch of the window, None inside a cached container which must draw its own text"""
+        node = self.parent
+        while isinstance(node, Object):
+            if getattr(node, 'cached', False):
+                return None
+            node = node.parent
+        return getattr(node, 'text_batch', None)
+
+    def get_view_scale(self) -> Tuple[float, float]:
+        """Scale of the content relative to its size at creation, zoom and rescale included"""
+        return self.width / self._original_width, self.height / self._original_height
+
     def set_zoom_limit(self, width_min=50, height_min=50, width_max=None, height_max=None):
         self.min_width = width_min
         self.min_height = height_min
@@ -260,6 +317,7 @@ class Object:
                 self.width = self._original_width * scale_x
                 self.height = self._original_height * scale_y
         self.compute_x_y(scale_x, scale_y)
+        self.mark_dirty('layout')
         self.notify_resize(scale_x, scale_y)
 
     def can_apply_zoom(self, zoom_factor_x, zoom_factor_y) -> bool:
@@ -309,6 +367,7 @@ class Object:
         new_anchor_point = self.get_anchor_point()
         self.x += (anchor_point[0] - new_anchor_point[0])
         self.y += (anchor_point[1] - new_anchor_point[1])
+        self.mark_dirty('layout', 'transform')
         self.notify_apply_zoom(zoom_factor_x, zoom_factor_y)
 
     def can_apply_drag(self, x, y, dx, dy):
@@ -331,6 +390,7 @@ class Object:
     def apply_drag(self, x, y, dx, dy):
         self.drag_offset_x += dx
         self.drag_offset_y += dy
+        self.mark_dirty('transform')
         self.notify_apply_drag(x, y, dx, dy)
 
     def update_max_drag(self):
@@ -351,12 +411,56 @@ class Object:
         pass
     
 class Container(Object):
+    """Rectangle holding child objects.
+
+    A ``cached`` container renders itself and its subtree into an offscreen framebuffer and
+    only blits it while nothing in the subtree is dirty. Moving the whole container keeps the
+    cache. Children are clipped to the container and should not set their own scissor.
+    """
     container_index = 0
-    def __init__(self, parent: Union['Object', arcade.Window], x, y, width, height, color, visible = True, rescale = True, keep_proportion = False, anchor = 'center', scrollable_x = False, scrollable_y = False, zoomable = False, overflow = False, name=None):
+    _cache_programs = {}
+
+    CACHE_VERTEX_SHADER = """
+    #version 330
+
+    uniform WindowBlock {
+        mat4 projection;
+        mat4 view;
+    } window;
+
+    uniform vec4 rect;
+
+    in vec2 in_vert;
+    out vec2 v_uv;
+
+    void main() {
+        gl_Position = window.projection * window.view * vec4(rect.xy + in_vert * rect.zw, 0.0, 1.0);
+        v_uv = in_vert;
+    }
+    """
+
+    CACHE_FRAGMENT_SHADER = """
+    #version 330
+
+    uniform sampler2D cache;
+
+    in vec2 v_uv;
+    out vec4 f_color;
+
+    void main() {
+        f_color = texture(cache, v_uv);
+    }
+    """
+
+    def __init__(self, parent: Union['Object', arcade.Window], x, y, width, height, color, visible = True, rescale = True, keep_proportion = False, anchor = 'center', scrollable_x = False, scrollable_y = False, zoomable = False, overflow = False, name=None, cached = False):
         super().__init__(parent, x, y, width, height, color, visible, rescale, keep_proportion, anchor, name)
         self.cont = Container.container_index
         Container.container_index += 1
 
+        self.cached = cached
+        self._cache = None
+        self._cache_geometry = None
+
         self.scrollable_x = scrollable_x
         self.scrollable_y = scrollable_y
         self.zoomable = zoomable
@@ -394,45 +498,77 @@ class Container(Object):
         self.notify_apply_drag(x, y, dx, dy)
         pass
 
-    def draw(self):
+    def apply_drag(self, x, y, dx, dy):
+        pending = bool(self.dirty_flags)
+        super().apply_drag(x, y, dx, dy)
+        if self.cached and not pending:
+            # The subtree moved as one block, the cached render only needs to be blitted elsewhere
+            self.clear_dirty()
+
+    def draw_content(self):
         if self.visible:
             arcade.draw_lbwh_rectangle_filled(self.x + self.drag_offset_x, self.y + self.drag_offset_y, self.width, self.height, self.color)
         super().draw()
 
+    def render_cache(self):
+        ctx = arcade.get_window().ctx
+        size = (max(1, int(np.ceil(self.width))), max(1, int(np.ceil(self.height))))
+        if self._cache is None or self._cache.size != size:
+            self._cache = ctx.framebuffer(color_attachments=[ctx.texture(size, components=4)])
+        left, bottom = self.x + self.drag_offset_x, self.y + self.drag_offset_y
+
+        projection, view = ctx.projection_matrix, ctx.view_matrix
+        with self._cache.activate() as fbo:
+            fbo.clear()
+            ctx.projection_matrix = Mat4.orthogonal_projection(left, left + size[0], bottom, bottom + size[1], -100, 100)
+            ctx.view_matrix = Mat4()
+            self.draw_content()
+        ctx.projection_matrix, ctx.view_matrix = projection, view
+        self.clear_dirty()
+
+    def blit_cache(self):
+        ctx = arcade.get_window().ctx
+        if ctx not in Container._cache_programs:
+            Container._cache_programs[ctx] = ctx.program(vertex_shader=self.CACHE_VERTEX_SHADER, fragment_shader=self.CACHE_FRAGMENT_SHADER)
+        program = Container._cache_programs[ctx]
+        if self._cache_geometry is None:
+            quad = np.array([0, 0, 1, 0, 0, 1, 1, 1], dtype=np.float32)
+            self._cache_geometry = ctx.geometry([BufferDescription(ctx.buffer(data=quad), "2f", ["in_vert"])], mode=ctx.TRIANGLE_STRIP)
+
+        width, height = self._cache.size
+        program["rect"] = (self.x + self.drag_offset_x, self.y + self.drag_offset_y, width, height)
+        self._cache.color_attachments[0].use(0)
+        ctx.enable(ctx.BLEND)
+        self._cache_geometry.render(program)
+
+    def draw(self):
+        if not self.cached:
+            self.draw_content()
+            return
+        if self.dirty_flags or self._cache is None:
+            self.render_cache()
+        self.blit_cache()
+
 class FunctionObject(Object):
     def __init__(self, parent: Union['Object', arcade.Window], width=None, height=None, color=None, visible=True, rescale=True, keep_proportion=True, anchor='center'):
         x, y = 0, 0
         super().__init__(parent, x, y, parent.width, parent.height, color, visible, rescale, keep_proportion, anchor)
         self.function = None
-        self.initial_width = parent.width
-        self.initial_height = parent.height
-
-    def remap_point_on_zoom(self, scale_x, scale_y):
-        return [(x * scale_x, y * scale_y) for x, y in self.base_point]
 
     def apply_zoom(self, zoom_factor_x, zoom_factor_y):
         super().apply_zoom(zoom_factor_x, zoom_factor_y)
-        scale_x = self.width / self.initial_width
-        scale_y = self.height / self.initial_height
-
-        self.radius = self.base_radius * min(scale_x, scale_y)
-        self.radius = max(1, self.radius)
-
-        self.point = self.remap_point_on_zoom(scale_x, scale_y)
-        num = 0
-        if self.function in (arcade.draw_circle_filled, arcade.draw_circle_outline):
-            num = 3
+        self.radius = max(1, self.base_radius * min(self.get_view_scale()))
 
     def set_function(self, function, *args, **kwargs):
         self.function = function
         if self.function in (arcade.draw_circle_filled, arcade.draw_circle_outline):
-            self.point = [(args[0], args[1])]
-            self.base_point = np.array(self.point, dtype=float)
+            self.base_point = np.array([args[0], args[1]], dtype=float)
             self.radius = args[2]
             self.base_radius = self.radius
             self.color = args[3]
         self.args = args
         self.kwargs = kwargs
+        self.mark_dirty('content')
 
     def draw(self):
         if not self.visible:
@@ -442,53 +578,199 @@ class FunctionObject(Object):
             raise ValueError("Plaese use set_function")
         
         if self.function in (arcade.draw_circle_filled, arcade.draw_circle_outline):
-            self.function(self.point[0][0] + self.x + self.drag_offset_x, self.point[0][1] + self.y + self.drag_offset_y, self.radius, self.color,*self.args[4:], **self.kwargs)
+            x, y = self.base_point * self.get_view_scale()
+            self.function(x + self.x + self.drag_offset_x, y + self.y + self.drag_offset_y, self.radius, self.color,*self.args[4:], **self.kwargs)
         super().draw()
 
-class LineObject(Object):
-    def __init__(self, parent: Union['Object', arcade.Window], function, *args, width=None, height=None, color=None, visible=True, rescale=True, keep_proportion=True, anchor='center'):
+class CarLayer(Object):
+    """All the car markers of a container drawn as instanced quads in a single draw call.
+
+    Positions are given in the parent coordinates (before zoom), zoom and drag are applied by
+    the shader so only ``update_positions`` writes to the GPU.
+    """
+    _programs = {}
+
+    VERTEX_SHADER = """
+    #version 330
+
+    uniform WindowBlock {
+        mat4 projection;
+        mat4 view;
+    } window;
+
+    uniform vec2 offset;
+    uniform vec2 scale;
+    uniform float radius;
+
+    in vec2 in_corner;
+    in vec2 in_pos;
+    in vec4 in_color;
+
+    out vec2 v_corner;
+    out vec4 v_color;
+
+    void main() {
+        gl_Position = window.projection * window.view * vec4(offset + in_pos * scale + in_corner * radius, 0.0, 1.0);
+        v_corner = in_corner;
+        v_color = in_color;
+    }
+    """
+
+    FRAGMENT_SHADER = """
+    #version 330
+
+    in vec2 v_corner;
+    in vec4 v_color;
+    out vec4 f_color;
+
+    void main() {
+        if (dot(v_corner, v_corner) > 1.0)
+            discard;
+        f_color = v_color;
+    }
+    """
+
+    def __init__(self, parent: Union['Object', arcade.Window], capacity, radius=2, color=arcade.color.GREEN, visible=True, rescale=True, keep_proportion=True, anchor='center'):
         x, y = 0, 0
         super().__init__(parent, x, y, parent.width, parent.height, color, visible, rescale, keep_proportion, anchor)
-        
-        self.function = function
-        self.points = self._interpolate(args[0])
-        self.args = args
-        self.color = args[1]
-        self.thickness = args[2]
+        self.capacity = capacity
+        self.count = 0
+        self.radius = radius
+        self.base_radius = radius
+
+        self.ctx = arcade.get_window().ctx
+        self.program = self.get_program(self.ctx)
+        corners = np.array([-1, -1, 1, -1, -1, 1, 1, 1], dtype=np.float32)
+        self.corners_buffer = self.ctx.buffer(data=corners)
+        self.positions_buffer = self.ctx.buffer(reserve=capacity * 2 * 4)
+        self.colors_buffer = self.ctx.buffer(data=np.tile(np.array(arcade.types.Color.from_iterable(color), dtype=np.uint8), (capacity, 1)))
+        self.geometry = self.ctx.geometry([
+            BufferDescription(self.corners_buffer, "2f", ["in_corner"]),
+            BufferDescription(self.positions_buffer, "2f", ["in_pos"], instanced=True),
+            BufferDescription(self.colors_buffer, "4f1", ["in_color"], instanced=True),
+        ], mode=self.ctx.TRIANGLE_STRIP)
 
-        self.base_points = np.array(self.points, dtype=float)
-        self.base_thickness = self.thickness
+    @classmethod
+    def get_program(cls, ctx):
+        if ctx not in cls._programs:
+            cls._programs[ctx] = ctx.program(vertex_shader=cls.VERTEX_SHADER, fragment_shader=cls.FRAGMENT_SHADER)
+        return cls._programs[ctx]
+
+    def update_positions(self, points: np.ndarray):
+        """Upload (N, 2) positions, N <= capacity"""
+        points = np.ascontiguousarray(points, dtype=np.float32)
+        if len(points) > self.capacity:
+            raise ValueError(f"CarLayer holds at most {self.capacity} cars")
+        self.count = len(points)
+        self.positions_buffer.write(points)
+        self.mark_dirty('content')
+
+    def update_colors(self, colors):
+        """Upload one RGBA color per car"""
+        colors = np.ascontiguousarray([arcade.types.Color.from_iterable(c) for c in colors], dtype=np.uint8)
+        self.colors_buffer.write(colors)
+        self.mark_dirty('content')
 
-        self.initial_width = parent.width
-        self.initial_height = parent.height
-        xs = [p[0] for p in self.points]
-        ys = [p[1] for p in self.points]
-        x_max, y_max = max(xs), max(ys)
-        self.initial_max_x  = x_max
-        self.initial_max_y = y_max
+    def apply_zoom(self, zoom_factor_x, zoom_factor_y):
+        super().apply_zoom(zoom_factor_x, zoom_factor_y)
+        self.radius = max(1, self.base_radius * min(self.get_view_scale()))
 
-    def _interpolate(self, points, nb_points = 2000):
-        xs = [p[0] for p in points]
-        ys = [p[1] for p in points]
-        t_old = np.linspace(0, 1, len(xs))
-        t_new = np.linspace(0, 1, nb_points)
-        xs_i = np.interp(t_new, t_old, xs)
-        ys_i = np.interp(t_new, t_old, ys)
-        return [(float(x), float(y)) for x, y in zip(xs_i, ys_i)]
+    def draw(self):
+        if not self.visible or self.count == 0:
+            return
 
-    def remap_point_on_zoom(self, scale_x, scale_y):
-        return [(x * scale_x, y * scale_y) for x, y in self.base_points]
+        if isinstance(self.parent, Container) and not self.parent.overflow:
+            self.ctx.scissor = (int(self.parent.x), int(self.parent.y), int(self.parent.width), int(self.parent.height))
+
+        self.program["offset"] = (self.x + self.drag_offset_x, self.y + self.drag_offset_y)
+        self.program["scale"] = self.get_view_scale()
+        self.program["radius"] = self.radius
+        self.ctx.enable(self.ctx.BLEND)
+        self.geometry.render(self.program, instances=self.count)
+        self.ctx.scissor = None
+        super().draw()
 
-    def apply_zoom(self, scroll_x, scroll_y):
-        super().apply_zoom(scroll_x, scroll_y)
+def simplification_significance(points: np.ndarray) -> np.ndarray:
+    """Douglas-Peucker tolerance up to which each point of an (N, 2) polyline is kept.
+
+    ``points[significance > tol]`` is the Douglas-Peucker simplification of the polyline for
+    ``tol``, so a single pass gives every level of detail. End points are always kept.
+    """
+    n = len(points)
+    significance = np.zeros(n)
+    significance[[0, -1]] = np.inf
+    stack = [(0, n - 1, np.inf)]
+    while stack:
+        i, j, parent = stack.pop()
+        if j - i < 2:
+            continue
+        segment = points[j] - points[i]
+        rel = points[i + 1:j] - points[i]
+        length = np.hypot(*segment)
+        if length == 0:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        else:
+            dist = np.abs(segment[0] * rel[:, 1] - segment[1] * rel[:, 0]) / length
+        k = int(np.argmax(dist))
+        # A point can't outlive the split that created its segment
+        value = min(dist[k], parent)
+        m = i + 1 + k
+        significance[m] = value
+        stack.append((i, m, value))
+        stack.append((m, j, value))
+    return significance
 
-        scale_x = self.width / self.initial_width
-        scale_y = self.height / self.initial_height
 
-        self.thickness = self.base_thickness * min(scale_x, scale_y)
-        self.thickness = max(1, self.thickness)
+class LineObject(Object):
+    """Polyline uploaded once to the GPU, drag and zoom are applied as a view transform.
 
-        self.points = self.remap_point_on_zoom(scale_x, scale_y)
+    The polyline is drawn at a level of detail following the zoom: level ``k`` is the
+    Douglas-Peucker simplification at ``LOD_TOLERANCE / 2**k`` pixels, each level geometry is
+    built on first use and kept. Negative levels are coarser, for zooming out.
+    """
+    SHAPE_BUILDERS = {arcade.draw_line_strip: shape_list.create_line_strip}
+    LOD_TOLERANCE = 0.5
+    MIN_LOD_LEVEL = -6
+    MAX_LOD_LEVEL = 10
+
+    def __init__(self, parent: Union['Object', arcade.Window], function, *args, width=None, height=None, color=None, visible=True, rescale=True, keep_proportion=True, anchor='center'):
+        x, y = 0, 0
+        super().__init__(parent, x, y, parent.width, parent.height, color, visible, rescale, keep_proportion, anchor)
+        
+        if function not in self.SHAPE_BUILDERS:
+            raise ValueError("LineObject function must be one of: draw_line_strip")
+        self.function = function
+        self.args = args
+        self.color = args[1]
+        # Stroke width in world units, it scales with the zoom like the rest of the view
+        self.thickness = args[2]
+
+        self.set_points(args[0])
+        self.initial_max_x, self.initial_max_y = self.points.max(axis=0)
+
+    def set_points(self, points):
+        points = np.asarray(points, dtype=float)
+        # Repeated samples add nothing to the polyline
+        keep = np.ones(len(points), dtype=bool)
+        keep[1:] = np.any(np.diff(points, axis=0) != 0, axis=1)
+        self.points = points[keep]
+        self.significance = simplification_significance(self.points)
+        self.shapes = {}
+        self.mark_dirty('content')
+
+    def get_lod_level(self, scale) -> int:
+        """Coarsest level whose error, once scaled on screen, stays under ``LOD_TOLERANCE`` pixels"""
+        return min(max(int(np.ceil(np.log2(scale))), self.MIN_LOD_LEVEL), self.MAX_LOD_LEVEL)
+
+    def get_lod_points(self, level) -> np.ndarray:
+        return self.points[self.significance > self.LOD_TOLERANCE / 2 ** level]
+
+    def get_shape(self, level):
+        if level not in self.shapes:
+            shape = shape_list.ShapeElementList()
+            shape.append(self.SHAPE_BUILDERS[self.function](self.get_lod_points(level).tolist(), self.color, self.thickness, *self.args[3:]))
+            self.shapes[level] = shape
+        return self.shapes[level]
 
     def draw(self):
         if not self.visible:
@@ -497,64 +779,92 @@ class LineObject(Object):
         if isinstance(self.parent, Container) and not self.parent.overflow:
             arcade.get_window().ctx.scissor = (int(self.parent.x), int(self.parent.y), int(self.parent.width), int(self.parent.height))
         
-        n_points = [(x + self.x + self.drag_offset_x, y + self.y + self.drag_offset_y) for (x, y) in self.points]
-        self.function(n_points, self.color, self.thickness, *self.args[3:])
-        arcade.get_window().ctx.scissor = None
+        ctx = arcade.get_window().ctx
+        view = ctx.view_matrix
+        scale_x, scale_y = self.get_view_scale()
+        shape = self.get_shape(self.get_lod_level(max(scale_x, scale_y)))
+        ctx.view_matrix = view @ Mat4.from_translation(Vec3(self.x + self.drag_offset_x, self.y + self.drag_offset_y, 0)) @ Mat4.from_scale(Vec3(scale_x, scale_y, 1))
+        shape.draw()
+        ctx.view_matrix = view
+        ctx.scissor = None
         super().draw()
 
 class TextObject(Object):
+    """Text built once by ``set_function`` and then only updated in place.
+
+    Outside cached containers the text joins the window text batch and is drawn with the
+    rest of the HUD in one call.
+    """
     def __init__(self, parent: Union['Object', arcade.Window], width=None, height=None, color=None, visible=True, rescale=True, keep_proportion=True, anchor='center'):
         x, y = 0, 0
         super().__init__(parent, x, y, 0, 0, color, visible, rescale, keep_proportion, anchor)
         self.function = None
         self.text = None
+        self.batch = None
 
     def update_dim(self):
         if self.text == None:
             raise ValueError("Text doesn't exist. Please use set_function before update_text")
-        self.width = self.text.content_width + self.text.x
-        self.height = self.text.content_height + self.text.y
+        self.width = self.text.content_width + self.text_x
+        self.height = self.text.content_height + self.text_y
 
     def update_pos(self):
         if self.text == None:
             raise ValueError("Text doesn't exist. Please use set_function before update_text")
-        self.text.x = self.text.x + self.x
-        self.text.y = self.text.y + self.y
+        position = (self.text_x + self.x, self.text_y + self.y)
+        if self.text.position != position:
+            self.text.position = position
         
     def update_text(self, new_text):
         if self.text == None:
             raise ValueError("Text doesn't exist. Please use set_function before update_text")
+        if self.text.text == new_text:
+            return
         self.text.text = new_text
         self.update_dim()
+        self.mark_dirty('content')
 
     def set_function(self, function, *args, **kwargs):
+        if self.text is not None and function == self.function and args[1:] == self.args[1:] and kwargs == self.kwargs:
+            self.update_text(args[0])
+            return
+
         self.function = function
         self.args = args
         self.kwargs = kwargs
-        self.text = self.function(*self.args, **self.kwargs)
+        self.text_x, self.text_y = args[1], args[2]
+        if self.function == arcade.Text:
+            self.batch = self.get_text_batch()
+            kwargs = {'batch': self.batch, **kwargs}
+        self.text = self.function(*self.args, **kwargs)
         self.update_dim()
+        self.mark_dirty('content')
 
     def draw(self):
+        if self.function == None:
+            raise ValueError("Plaese use set_function")
+        if self.batch is not None and self.text.visible != self.visible:
+            self.text.visible = self.visible
         if not self.visible:
             return
 
-        if self.function == None:
-            raise ValueError("Plaese use set_function")
-        self.text = self.function(*self.args, **self.kwargs)
         self.update_pos()
-        self.text.draw()
+        if self.batch is None:
+            self.text.draw()
         super().draw()
 
 class OptimalTextObject(Object):
     def __init__(self, parent: Union['Object', arcade.Window], x=0, y=0, width=None, height=None, color=None, visible=True, rescale=True, keep_proportion=True, anchor='center'):
         super().__init__(parent, x, y, 0, 0, color, visible, rescale, keep_proportion, anchor)
-        self.text_object: arcade.Text = arcade.Text("", x, y, color=color, anchor_x=anchor)
+        self.batch = self.get_text_batch()
+        self.text_object: arcade.Text = arcade.Text("", x, y, color=color, anchor_x=anchor, batch=self.batch)
         self.dirty = True
 
     def update_text(self, new_text: str):
         if self.text_object.text != new_text:
             self.text_object.text = new_text
             self.dirty = True
+            self.mark_dirty('content')
 
     def update_font(self, font_name=None, font_size=None):
         if font_name is not None:
@@ -562,17 +872,21 @@ class OptimalTextObject(Object):
         if font_size is not None:
             self.text_object.font_size = font_size
         self.dirty = True
+        self.mark_dirty('content')
 
     def draw(self):
+        if self.batch is not None and self.text_object.visible != self.visible:
+            self.text_object.visible = self.visible
         if not self.visible:
             return
         if self.dirty:
             self.width = self.text_object.content_width
             self.height = self.text_object.content_height
             self.dirty = False
-        self.text_object.x = self.x
-        self.text_object.y = self.y
-        self.text_object.draw()
+        if self.text_object.position != (self.x, self.y):
+            self.text_object.position = (self.x, self.y)
+        if self.batch is None:
+            self.text_object.draw()
         super().draw()
 
 class TextureObject(Object):
@@ -590,6 +904,7 @@ class TextureObject(Object):
 
     def update_angle(self, angle):
         self.angle = angle
+        self.mark_dirty('content')
 
     def draw(self):
         if not self.visible:
@@ -619,6 +934,9 @@ class RaceWindow(arcade.Window):
         self.zoom_listeners = []
         self.drag_listeners = []
 
+        # Every text outside cached containers, drawn in one call after the objects
+        self.text_batch = pyglet.graphics.Batch()
+
         self.dragging = False
 
     def add_listener(self, type: str, fn):
@@ -656,6 +974,7 @@ class RaceWindow(arcade.Window):
     def on_draw(self):
         self.clear()
         self.notify_draw()
+        self.text_batch.draw()
 
     def on_resize(self, width: int, height: int):
         """Gère le redimensionnement de la fenêtre"""
@@ -676,6 +995,11 @@ class RaceWindow(arcade.Window):
         if self.dragging:
             self.notify_drag(x, y, dx, dy)
 
+    def on_mouse_drag(self, x, y, dx, dy, buttons, modifiers):
+        # pyglet reports motion with a button held as a drag, not as a motion
+        if self.dragging:
+            self.notify_drag(x, y, dx, dy)
+
     def on_mouse_release(self, x, y, button, modifiers):
         if button == arcade.MOUSE_BUTTON_LEFT:
             self.dragging = False
@@ -2,38 +2,101 @@ import NewRenderer as rend
 import arcade
 import Main
 import numpy as np
-from UI_manager import DriverInfos, RaceInfos, StartingLight, LeaderBoard
+from UI_manager import DriverInfos, RaceInfos, StartingLight, LeaderBoard, LoadingBar, TimeLine
 from f1_data_manager import RaceDataManager, ScheduleDataManager
+from position_engine import PositionEngine, PlaybackSampler
+from geometry import ViewTransform
+from playback_clock import PlaybackClock
 from typing import Union, Literal
 
 import random
+import queue
+import threading
 
 FPS = 60
 DT = 1 / FPS
 
 class RaceReplay(rend.RaceWindow):
-    def __init__(self, year, session_number, session_type: Union[Literal['R'], Literal['S'], Literal['Q']] = 'R'):
+    def __init__(self, year, session_number, session_type: Union[Literal['R'], Literal['S'], Literal['Q']] = 'R', run=True):
         self.load_fonts()
         self.WIDTH = 1280
         self.HEIGHT = 720
-        self.race_data = RaceDataManager(year, session_number, session_type)
         super().__init__("Race", self.WIDTH, self.HEIGHT)
         self.set_update_rate(DT)
-        
+        # Zoom and drag are applied on the GPU by the containers, the view only rotates and fits
+        self.world_view = ViewTransform(self.WIDTH, self.HEIGHT)
+        # on_update only ticks the clock, on_draw samples it
+        self.clock = PlaybackClock()
+        self.car_points = None
+
+        # The session loads in a background thread, its progress is applied in on_update
+        self.race_data = RaceDataManager(year, session_number, session_type, load=False)
+        self.positions = None
+        self.sampler = None
+        self.ready = False
+        self.loaded_codes = []
+        self.loading_events = queue.SimpleQueue()
+        self.loading_error = None
+        self.loaded = threading.Event()
+        # Daemon thread: closing the window mid download must not wait for the load to finish
+        self.loader = threading.Thread(target=self.load_race, name="race-loader", daemon=True)
+        self.loader.start()
 
         self.reset()
         self.main_draw()
         
         self.light = StartingLight(self)
         
-        self.run()
+        if run:
+            self.run()
+
+    def load_race(self):
+        try:
+            self.race_data.load(progress=lambda *event: self.loading_events.put(event))
+            positions = PositionEngine(self.race_data.drivers_data)
+            self.loading_events.put(('ready', positions))
+        except Exception as error:
+            self.loading_error = error
+        finally:
+            self.loaded.set()
+
+    def process_loading_events(self):
+        while True:
+            try:
+                stage, *args = self.loading_events.get_nowait()
+            except queue.Empty:
+                break
+            if stage == 'track':
+                self.draw_track(self.track_container, 'fast')
+                self.draw_track(self.track_container, 'box')
+                self.loading_bar.set_progress(0.0, "Loading telemetry")
+            elif stage == 'driver':
+                code, done, total = args
+                self.add_driver(code)
+                self.loading_bar.set_progress(done / total, f"Loading telemetry {done}/{total}")
+            elif stage == 'done':
+                self.loading_bar.set_progress(1.0, "Building the race timeline")
+            elif stage == 'ready':
+                self.on_race_loaded(*args)
+
+        if self.loading_error is not None and not self.ready:
+            # Re-raises in the main thread if the loading failed
+            raise self.loading_error
+
+    def wait_until_loaded(self):
+        """Block until the session is loaded and applied, for use without the event loop"""
+        self.loaded.wait()
+        self.process_loading_events()
 
     def reset(self):
-        self.paused = True
         self.start_start_procedure = False
         self.global_time = 0.0
         self.race_time = 0.0
-        self.play_speed = 1.0
+        self.clock.pause()
+        self.clock.seek(0.0)
+        self.clock.set_rate(1.0)
+        if self.sampler is not None:
+            self.sampler.seek(self.positions.start_time)
         
         self.light_counter = 0
         self.random_time = random.uniform(1, 1.5)
@@ -50,46 +113,38 @@ class RaceReplay(rend.RaceWindow):
         if self.global_time > 4 + self.random_time:
             for l in lights:
                 l.color = (50, 50, 50)
-            self.paused = False
+            self.start_start_procedure = False
+            self.clock.resume()
 
     def main_draw(self):
-        track_container = rend.Container(self, 0, 0, 1280, 720, arcade.color.RED, anchor='bottom_center', rescale=True, keep_proportion=False, visible=False, scrollable_x=True, scrollable_y=True, zoomable=True)
-        self.draw_track(track_container, 'fast')
-        self.draw_track(track_container, 'box')
-        self.driver_plot_test(track_container)
+        self.track_container = rend.Container(self, 0, 0, 1280, 720, arcade.color.RED, anchor='bottom_center', rescale=True, keep_proportion=False, visible=False, scrollable_x=True, scrollable_y=True, zoomable=True)
+        self.drivers_dot = None
 
-        self.leaderbord = LeaderBoard(self, self.race_data.get_max_lap())
+        self.leaderbord = LeaderBoard(self, None)
+        self.timeline = TimeLine(self)
+        self.scrubbing = False
+        self.loading_bar = LoadingBar(self)
+        self.loading_bar.set_progress(0.0, "Loading session")
 
         self.debug = rend.TextObject(self)
         self.debug.set_function(arcade.Text, f"{self.race_time}", 0, 0, arcade.color.WHITE)
 
 
-    def world_to_screen(self, points):
-        _cos_rot = np.cos(self.race_data.rotation)
-        _sin_rot = np.sin(self.race_data.rotation)
-        rot_mat = np.array([[ _cos_rot, -_sin_rot],
-                            [ _sin_rot,  _cos_rot]])
-        #x_min, y_min = points.min(axis=0)
-        #x_max, y_max = points.max(axis=0)
-
-        scale_x = self.WIDTH / (self.x_max - self.x_min) if (self.x_max - self.x_min) != 0 else self.WIDTH
-        scale_y = self.HEIGHT / (self.y_max - self.y_min) if (self.y_max - self.y_min) != 0 else self.HEIGHT
-        scale = min(scale_x, scale_y)
-
-        offset_x = (self.WIDTH - (self.x_max - self.x_min) * scale) / 2 - self.x_min * scale
-        offset_y = (self.HEIGHT - (self.y_max - self.y_min) * scale) / 2 - self.y_min * scale
-        offset = np.array([offset_x, offset_y])
-
-        p = points
-        if self.race_data.rotation != 0:
-            p = p @ rot_mat.T
-        return p * scale  + offset
+    def world_to_screen(self, points, out=None):
+        return self.world_view.apply(points, out)
 
     def draw_track(self, container, lap_type):
-        points = self.race_data.get_track_layout(lap_type).to_numpy(dtype=float)
-        self.x_min, self.y_min = points.min(axis=0)
-        self.x_max, self.y_max = points.max(axis=0)
-        points = self.world_to_screen(points)
+        if lap_type not in self.race_data.track_layouts:
+            return
+        if lap_type == 'fast' and self.race_data.geometry is not None:
+            points = self.race_data.geometry.closed()
+        else:
+            points = self.race_data.track_layouts[lap_type].to_numpy(dtype=float)
+        if self.world_view.fit_points is None:
+            # The first track drawn sets the frame of everything else
+            self.world_view.set_rotation(self.race_data.rotation)
+            self.world_view.fit(points)
+        points = self.world_to_screen(points, np.empty(points.shape))
         points = [tuple(p) for p in points]
         
         if lap_type == 'fast':
@@ -98,42 +153,100 @@ class RaceReplay(rend.RaceWindow):
         elif lap_type == 'box':
             self.stand = rend.LineObject(container, arcade.draw_line_strip, points, arcade.color.GRAY, 2, color=arcade.color.WHITE, rescale=False, keep_proportion=True)
             
-    def driver_plot_test(self, container):
-        drivers_data = self.race_data.results
-
-        self.drivers_dot = []
-        for d_data in drivers_data:
-            x = d_data['data']['x'][0][0]
-            y = d_data['data']['y'][0][0]
-            p = self.world_to_screen(np.array([[x, y]]))
-            obj = rend.FunctionObject(container, rescale=False)
-            obj.set_function(arcade.draw_circle_filled, p[0][0], p[0][1], 2, arcade.color.GREEN)
-            obj.enable_border(arcade.color.GREEN)
-            self.drivers_dot.append(obj)
-        
+    def add_driver(self, code):
+        """Show a driver as soon as its telemetry is loaded, on the grid at its first sample"""
+        if self.drivers_dot is None:
+            self.drivers_dot = rend.CarLayer(self.track_container, len(self.race_data.drivers_codes), radius=2, color=arcade.color.GREEN, rescale=False)
+        self.loaded_codes.append(code)
+        self.leaderbord.table.add_driver(code)
+        telemetry = self.race_data.drivers_data.get(code)
+        if telemetry is None:
+            return
+        starts = [(self.race_data.drivers_data[c]['x'][0], self.race_data.drivers_data[c]['y'][0]) for c in self.loaded_codes if c in self.race_data.drivers_data]
+        self.drivers_dot.update_positions(self.world_to_screen(np.array(starts, dtype=float)))
+
+    def on_race_loaded(self, positions):
+        self.positions = positions
+        self.sampler = PlaybackSampler(positions)
+        self.car_points = np.empty((len(positions), 2), dtype=np.float32)
+        self.clock.end = positions.end_time - positions.start_time
+        self.timeline.set_duration(self.clock.end)
+        self.drivers_dot.update_positions(self.world_to_screen(positions.positions_at(positions.start_time)))
+        self.leaderbord.set_max_laps(self.race_data.get_max_lap())
+        self.leaderbord.table.set_order(positions.codes)
+        self.loading_bar.hide()
+        self.ready = True
+
+    def advance_to(self, race_time):
+        """Move the replay to ``race_time`` seconds after the first telemetry sample"""
+        self.race_time = race_time
+        self.update_drivers()
+        self.leaderbord.update_timeline(self.race_data.timeline, self.positions.start_time + self.race_time)
+        self.timeline.set_time(race_time)
+
+    def seek(self, race_time):
+        """Jump anywhere in the race. Nothing is replayed from the start: the sampler finds every
+        driver's samples with one search and the leaderboard reads its row of the race timeline"""
+        self.clock.seek(race_time)
+
+    def update_drivers(self):
+        points = self.world_to_screen(self.sampler.sample(self.positions.start_time + self.race_time), self.car_points)
+        self.drivers_dot.update_positions(points)
 
 
 
     def on_key_press(self, symbol, modifiers):
-        if symbol == arcade.key.ENTER:
+        if symbol == arcade.key.ENTER and self.ready:
             self.global_time = 0.0
             self.start_start_procedure = True
         elif symbol == arcade.key.R:
             self.clear()
             self.reset()
+        elif not self.ready:
+            return
+        elif symbol == arcade.key.SPACE:
+            self.clock.toggle()
+        elif symbol in (arcade.key.UP, arcade.key.DOWN):
+            rate = self.clock.rate * (2 if symbol == arcade.key.UP else 0.5)
+            self.clock.set_rate(min(max(rate, PlaybackClock.MIN_RATE), PlaybackClock.MAX_RATE))
+        elif symbol in (arcade.key.LEFT, arcade.key.RIGHT):
+            seconds = 60 if modifiers & arcade.key.MOD_SHIFT else 10
+            self.seek(self.clock.time + (seconds if symbol == arcade.key.RIGHT else -seconds))
+
+    def on_mouse_press(self, x, y, button, modifiers):
+        if self.ready and button == arcade.MOUSE_BUTTON_LEFT and self.timeline.contains(x, y):
+            self.scrubbing = True
+            self.seek(self.timeline.time_at(x))
+            return
+        super().on_mouse_press(x, y, button, modifiers)
+
+    def on_mouse_drag(self, x, y, dx, dy, buttons, modifiers):
+        if self.scrubbing:
+            self.seek(self.timeline.time_at(x))
+            return
+        super().on_mouse_drag(x, y, dx, dy, buttons, modifiers)
+
+    def on_mouse_release(self, x, y, button, modifiers):
+        if button == arcade.MOUSE_BUTTON_LEFT:
+            self.scrubbing = False
+        super().on_mouse_release(x, y, button, modifiers)
 
     def on_update(self, delta_time):
         super().on_update(delta_time)
-        self.debug.set_function(arcade.Text, f"{self.race_time}", 0, 0, arcade.color.WHITE)
+        self.debug.update_text(f"{self.race_time:.2f} x{self.clock.rate:g}")
+        if not self.ready:
+            self.process_loading_events()
         if self.start_start_procedure:
             self.start_procedure()
+            self.global_time += delta_time
+        self.clock.tick(delta_time)
 
-        if self.paused:
-            self.global_time += delta_time * self.play_speed
-            return
-        self.race_time += delta_time * self.play_speed
+    def on_draw(self):
+        if self.ready and self.clock.time != self.race_time:
+            self.advance_to(self.clock.time)
+        super().on_draw()
         
         
 
 if __name__ == "__main__":
-    race = RaceReplay(2021, 7, 'R')
\ No newline at end of file
+    race = RaceReplay(*ScheduleDataManager().resolve("France 2021 R"))
\ No newline at end of file
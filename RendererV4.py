@@ -1,6 +1,7 @@
 import arcade
 import numpy as np
 import Main
+from geometry import rotate
 from typing import List, Tuple, Callable, Optional, Union
 from dataclasses import dataclass
 
@@ -456,21 +457,8 @@ class RaceWindow(arcade.Window):
         }
 
     def _rotate_points(self, points, plot_x, plot_y):
-        center_x = np.mean(plot_x)
-        center_y = np.mean(plot_y)
-        
-        cos_r = np.cos(self.circuit_rotation)
-        sin_r = np.sin(self.circuit_rotation)
-        
-        rotated = []
-        for x, y in points:
-            tx = x - center_x
-            ty = y - center_y
-            rx = tx * cos_r - ty * sin_r
-            ry = tx * sin_r + ty * cos_r
-            rotated.append((rx + center_x, ry + center_y))
-        
-        return rotated
+        center = (np.mean(plot_x), np.mean(plot_y))
+        return rotate(np.asarray(points, dtype=float), self.circuit_rotation, center).tolist()
     
     def update_screen_coordinates(self):
         if not self.world_bounds:
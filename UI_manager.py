@@ -1,5 +1,7 @@
 import NewRenderer as rend
 import arcade
+import pyglet
+from arcade import shape_list
 import Main
 import numpy as np
 
@@ -9,7 +11,7 @@ class StartingLight:
     def __init__(self, parent):
         self.WIDTH = 300
         self.HEIGHT = 150
-        self.container = rend.Container(parent, parent.width / 2 - self.WIDTH / 2, parent.height - self.HEIGHT, self.WIDTH, self.HEIGHT, arcade.color.RED, rescale=False, anchor="top_center", visible=False)
+        self.container = rend.Container(parent, parent.width / 2 - self.WIDTH / 2, parent.height - self.HEIGHT, self.WIDTH, self.HEIGHT, arcade.color.RED, rescale=False, anchor="top_center", visible=False, cached=True)
         self.high_part = rend.Container(self.container, 0, self.HEIGHT / 2, self.WIDTH, self.HEIGHT / 2, (15, 15, 15), rescale=False)
 
         red_light_width = 40
@@ -42,18 +44,142 @@ class StartingLight:
 class LeaderBoard:
     def __init__(self, container, max_laps):
         self.leaderbord_container = rend.Container(container, 0, 100, 200, 600, arcade.color.YELLOW, rescale=False, anchor='top_left', keep_proportion=True)
-        self.header = rend.Container(self.leaderbord_container, 0, 500, 200, 100, (15, 15, 15), rescale=False, keep_proportion=True, anchor="top_left", name="header")
+        self.header = rend.Container(self.leaderbord_container, 0, 500, 200, 100, (15, 15, 15), rescale=False, keep_proportion=True, anchor="top_left", name="header", cached=True)
         self.f1_logo_container = rend.Container(self.header, 25, 25, 150, 75, arcade.color.RED, rescale=False, keep_proportion=True, anchor="top_center", visible=False)
         self.f1_logo = rend.TextureObject(self.f1_logo_container, "resources\F1Logo.png", 0, -40, 150, 150, rescale=False)
         self.lap_container = rend.Container(self.header, 0, 0, 200, 25, arcade.color.BLUE, rescale=False, keep_proportion=True, anchor="bottom_left")
         self.lap_text = rend.OptimalTextObject(self.lap_container, x=100, y=5, color=arcade.color.WHITE, anchor='center')
-        self.lap_text.update_text(f"1/{max_laps}")
         self.lap_text.update_font(font_name="Formula1Bold")
-        self.ranking = rend.Container(self.leaderbord_container, 0, 0, 200, 500, arcade.color.PINK, rescale=False, keep_proportion=True, anchor="bottom_center")
+        self.ranking = rend.Container(self.leaderbord_container, 0, 0, 200, 500, arcade.color.PINK, rescale=False, keep_proportion=True, anchor="bottom_center", cached=True)
+        self.table = LeaderBoardTable(self.ranking, rows=20, width=200, rescale=False)
+        self.timeline_row = None
+        self.set_max_laps(max_laps)
 
-        self.pilot_lines = []
-        for j in range(20):
-            self.pilot_lines.append(DriverInfos(self.ranking))
+    def set_max_laps(self, max_laps):
+        self.max_laps = max_laps
+        self.lap_text.update_text(f"1/{max_laps}" if max_laps else "")
+
+    def update_timeline(self, timeline, session_time):
+        row = timeline.index_at(session_time)
+        if row == self.timeline_row:
+            return
+        self.timeline_row = row
+
+        order = timeline.order[row]
+        self.table.set_order([timeline.codes[i] for i in order])
+        for rank, i in enumerate(order):
+            gap = "Leader" if rank == 0 else f"+{timeline.gap[row, i]:.3f}"
+            self.table.update_driver(timeline.codes[i], gap=gap)
+        lap = int(timeline.lap[row])
+        # Qualifying and practice sessions have no lap count
+        self.lap_text.update_text(f"{min(lap, self.max_laps)}/{self.max_laps}" if self.max_laps else f"Lap {lap}")
+
+class LeaderBoardTable(rend.Object):
+    """Every leaderboard row in one shape list and every label in one text batch.
+
+    Rows are fixed slots. Each driver owns its labels, so a new running order only moves
+    those labels to the y offset of their new slot.
+    """
+    ROW_HEIGHT = 25
+    FONT_SIZE = 10
+    COLUMNS = {'code': 35, 'gap': 165, 'tyre': 185}
+
+    def __init__(self, parent, rows=20, width=200, visible=True, rescale=True, keep_proportion=True, anchor='bottom_left'):
+        super().__init__(parent, 0, 0, width, rows * self.ROW_HEIGHT, arcade.color.RED, visible, rescale, keep_proportion, anchor)
+        self.rows = rows
+        self.batch = pyglet.graphics.Batch()
+        self.shapes = shape_list.ShapeElementList()
+        for row in range(rows):
+            center_y = self.row_y(row)
+            self.shapes.append(shape_list.create_rectangle_filled(width / 2, center_y, width, self.ROW_HEIGHT, arcade.color.RED))
+            self.shapes.append(shape_list.create_rectangle_filled(self.ROW_HEIGHT / 2, center_y, self.ROW_HEIGHT, self.ROW_HEIGHT, arcade.color.BLACK))
+            self.shapes.append(shape_list.create_rectangle_outline(width / 2, center_y, width, self.ROW_HEIGHT, arcade.color.BLACK))
+
+        self.position_labels = [self.create_label(str(row + 1), self.ROW_HEIGHT / 2, 'center') for row in range(rows)]
+        self.driver_labels = {}
+        self.order = []
+        self._origin = None
+
+    def row_y(self, row):
+        """Center y of a row, relative to the table, row 0 being the leader at the top"""
+        return self.height - (row + 0.5) * self.ROW_HEIGHT
+
+    def create_label(self, text, x, anchor_x):
+        return arcade.Text(text, x, 0, arcade.color.WHITE, self.FONT_SIZE, anchor_x=anchor_x, anchor_y='center', font_name="Formula1Bold", batch=self.batch)
+
+    def add_driver(self, code):
+        """Append a driver at the bottom of the current order"""
+        if code in self.driver_labels:
+            return
+        self.driver_labels[code] = {'code': self.create_label(code, self.COLUMNS['code'], 'left'),
+                                    'gap': self.create_label("", self.COLUMNS['gap'], 'right'),
+                                    'tyre': self.create_label("", self.COLUMNS['tyre'], 'center')}
+        self.set_order(self.order + [code])
+
+    def set_order(self, codes):
+        if list(codes[:self.rows]) == self.order:
+            return
+        self.order = list(codes[:self.rows])
+        self._origin = None
+        self.mark_dirty('content')
+
+    def update_driver(self, code, gap=None, tyre=None):
+        labels = self.driver_labels[code]
+        for key, value in (('gap', gap), ('tyre', tyre)):
+            if value is not None and labels[key].text != value:
+                labels[key].text = value
+                self.mark_dirty('content')
+
+    def layout_labels(self, origin_x, origin_y):
+        for row, label in enumerate(self.position_labels):
+            label.position = (origin_x + self.ROW_HEIGHT / 2, origin_y + self.row_y(row))
+        slots = {code: row for row, code in enumerate(self.order)}
+        for code, labels in self.driver_labels.items():
+            row = slots.get(code)
+            for key, label in labels.items():
+                label.visible = row is not None
+                if row is not None:
+                    label.position = (origin_x + self.COLUMNS[key], origin_y + self.row_y(row))
+
+    def draw(self):
+        if not self.visible:
+            return
+        origin = (self.x + self.drag_offset_x, self.y + self.drag_offset_y)
+        if origin != self._origin:
+            self._origin = origin
+            self.shapes.position = origin
+            self.layout_labels(*origin)
+        self.shapes.draw()
+        self.batch.draw()
+        super().draw()
+
+class LoadingBar(rend.Object):
+    """Progress of the background session loading, centered in its parent"""
+    def __init__(self, parent, width=400, height=16):
+        super().__init__(parent, parent.width / 2 - width / 2, parent.height / 2 - height / 2, width, height, (15, 15, 15), rescale=False, anchor='center')
+        self.progress = 0.0
+        self.label = rend.OptimalTextObject(self, x=width / 2, y=height + 10, color=arcade.color.WHITE, rescale=False, anchor='center')
+        self.label.update_font(font_name="Formula1Bold")
+
+    def set_progress(self, progress, text):
+        progress = min(max(progress, 0.0), 1.0)
+        if progress != self.progress:
+            self.progress = progress
+            self.mark_dirty('content')
+        self.label.update_text(text)
+
+    def hide(self):
+        self.visible = False
+        self.label.visible = False
+
+    def draw(self):
+        # Children still draw when hidden so the batched label syncs its own visibility
+        if self.visible:
+            x, y = self.x + self.drag_offset_x, self.y + self.drag_offset_y
+            arcade.draw_lbwh_rectangle_filled(x, y, self.width, self.height, self.color)
+            arcade.draw_lbwh_rectangle_filled(x, y, self.width * self.progress, self.height, arcade.color.RED)
+            arcade.draw_lbwh_rectangle_outline(x, y, self.width, self.height, arcade.color.WHITE)
+        super().draw()
 
 class RaceInfos:
     def __init__(self, parent):
@@ -81,6 +207,50 @@ class DriverCard:
     def __init__(self):
         pass
 
-class TimeLine:
-    def __init__(self):
-        pass
\ No newline at end of file
+class TimeLine(rend.Object):
+    """Scrubber along the bottom of the window, from the first to the last telemetry sample"""
+    HANDLE_WIDTH = 6
+
+    def __init__(self, parent, width=1200, height=8):
+        super().__init__(parent, parent.width / 2 - width / 2, 30, width, height, (60, 60, 60), rescale=False, anchor='bottom_center')
+        self.duration = None
+        self.race_time = 0.0
+        self.label = rend.OptimalTextObject(self, x=width - 60, y=height + 10, color=arcade.color.WHITE, rescale=False, anchor='center')
+        self.label.update_font(font_name="Formula1Bold")
+
+    @staticmethod
+    def format_time(seconds):
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02}:{seconds:02}" if hours else f"{minutes}:{seconds:02}"
+
+    def set_duration(self, duration):
+        if duration <= 0:
+            raise ValueError("Timeline duration must be positive")
+        self.duration = duration
+        self.set_time(self.race_time)
+
+    def set_time(self, race_time):
+        if self.duration is None:
+            return
+        race_time = min(max(race_time, 0.0), self.duration)
+        self.label.update_text(f"{self.format_time(race_time)} / {self.format_time(self.duration)}")
+        if race_time != self.race_time:
+            self.race_time = race_time
+            self.mark_dirty('content')
+
+    def contains(self, x, y):
+        """Hit test with some slack, the bar itself is only a few pixels high"""
+        return self.duration is not None and self.x <= x <= self.x + self.width and self.y - 10 <= y <= self.y + self.height + 10
+
+    def time_at(self, x):
+        """Race time under the screen abscissa ``x``"""
+        return min(max((x - self.x) / self.width, 0.0), 1.0) * self.duration
+
+    def draw(self):
+        if self.visible and self.duration is not None:
+            progress = self.width * self.race_time / self.duration
+            arcade.draw_lbwh_rectangle_filled(self.x, self.y, self.width, self.height, self.color)
+            arcade.draw_lbwh_rectangle_filled(self.x, self.y, progress, self.height, arcade.color.RED)
+            arcade.draw_lbwh_rectangle_filled(self.x + progress - self.HANDLE_WIDTH / 2, self.y - 4, self.HANDLE_WIDTH, self.height + 8, arcade.color.WHITE)
+        super().draw()
\ No newline at end of file
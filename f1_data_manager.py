@@ -1,42 +1,422 @@
+import os
+import tempfile
 import fastf1
 import numpy as np
+import pandas as pd
 from typing import Union, Literal
 from multiprocessing import cpu_count, Pool
 from joblib import Parallel, delayed
+from session_cache import SessionCache, CACHE_DIRECTORY, save_json, load_json, schedule_path
+from geometry import TrackGeometry
+
+# get_track_layout repeats the first points of the lap so the drawn line closes
+LAYOUT_CLOSING_POINTS = 5
 
 
 
 class ScheduleDataManager:
-    def __init__(self):
-        pass
+    """Event calendar of one or more seasons, fetched once per season and kept as JSON in the cache.
+
+    Every event is a dict (year, round, name, official_name, country, location, date, format,
+    sessions) indexed by (year, round), by lowercase name, country and location, by format and by
+    the day of each of its sessions, so resolving an event never goes through FastF1 again.
+    """
+    SESSION_NAMES = {
+        'FP1': 'Practice 1', 'FP2': 'Practice 2', 'FP3': 'Practice 3',
+        'Q': 'Qualifying', 'SQ': 'Sprint Qualifying', 'SS': 'Sprint Shootout',
+        'S': 'Sprint', 'R': 'Race',
+    }
+
+    def __init__(self, years=(), directory=CACHE_DIRECTORY):
+        self.directory = directory
+        self.seasons = {}
+        self.by_round = {}
+        self.by_name = {}
+        self.by_format = {}
+        self.by_day = {}
+        for year in years:
+            self.load_season(year)
+
+    def load_season(self, year, refresh=False):
+        if year in self.seasons and not refresh:
+            return self.seasons[year]
+        path = schedule_path(year, self.directory)
+        if os.path.exists(path) and not refresh:
+            events = load_json(path)
+        else:
+            events = self.fetch_season(year)
+            save_json(path, events)
+        self.seasons[year] = events
+        self.build_indexes()
+        return events
+
+    @staticmethod
+    def fetch_season(year):
+        schedule = fastf1.get_event_schedule(year, include_testing=False)
+        events = []
+        for _, row in schedule.iterrows():
+            sessions = []
+            for i in range(1, 6):
+                name, date = row.get(f'Session{i}'), row.get(f'Session{i}DateUtc')
+                if isinstance(name, str) and name:
+                    sessions.append({'name': name, 'date': None if pd.isna(date) else pd.Timestamp(date).isoformat()})
+            events.append({
+                'year': year,
+                'round': int(row['RoundNumber']),
+                'name': row['EventName'],
+                'official_name': row['OfficialEventName'],
+                'country': row['Country'],
+                'location': row['Location'],
+                'date': pd.Timestamp(row['EventDate']).date().isoformat(),
+                'format': row['EventFormat'],
+                'sessions': sessions,
+            })
+        return events
+
+    @staticmethod
+    def name_keys(event):
+        keys = {event['name'], event['country'], event['location'], event['name'].replace(" Grand Prix", "")}
+        return {key.lower() for key in keys if key}
+
+    def build_indexes(self):
+        self.by_round, self.by_name, self.by_format, self.by_day = {}, {}, {}, {}
+        for year in sorted(self.seasons):
+            for event in self.seasons[year]:
+                self.by_round[(year, event['round'])] = event
+                # A country can host several events in a season
+                for key in self.name_keys(event):
+                    self.by_name.setdefault(key, {}).setdefault(year, []).append(event)
+                self.by_format.setdefault(event['format'], []).append(event)
+                for day in sorted(set(session['date'][:10] for session in event['sessions'] if session['date'] is not None)):
+                    self.by_day.setdefault(day, []).append(event)
+
+    def get_event(self, year, name_or_round):
+        """Event of a season by round number or by name, country or location"""
+        self.load_season(year)
+        if isinstance(name_or_round, int):
+            events = [self.by_round[(year, name_or_round)]] if (year, name_or_round) in self.by_round else []
+        else:
+            events = self.by_name.get(name_or_round.strip().lower(), {}).get(year, [])
+        if not events:
+            raise KeyError(f"No event {name_or_round!r} in {year}")
+        if len(events) > 1:
+            raise ValueError(f"{name_or_round!r} is ambiguous in {year}: {', '.join(event['name'] for event in events)}")
+        return events[0]
+
+    def resolve(self, query):
+        """``"Monaco 2021 Q"`` to the ``(year, round, session_type)`` arguments of RaceDataManager"""
+        words = query.split()
+        session_type = 'R'
+        if words and words[-1].upper() in self.SESSION_NAMES:
+            session_type = words.pop().upper()
+        years = [word for word in words if word.isdigit() and len(word) == 4]
+        if len(years) != 1:
+            raise ValueError(f"Expected one year in {query!r}")
+        words.remove(years[0])
+
+        event = self.get_event(int(years[0]), " ".join(words))
+        if self.SESSION_NAMES[session_type] not in (session['name'] for session in event['sessions']):
+            raise ValueError(f"{event['name']} {event['year']} has no {self.SESSION_NAMES[session_type]} session")
+        return event['year'], event['round'], session_type
+
+    def events_on(self, date):
+        """Events with a session on that day"""
+        return self.by_day.get(pd.Timestamp(date).date().isoformat(), [])
+
+    def sprint_weekends(self, year=None):
+        if year is not None:
+            self.load_season(year)
+        events = [event for event_format, events in self.by_format.items() if event_format.startswith('sprint') for event in events]
+        if year is not None:
+            events = [event for event in events if event['year'] == year]
+        return sorted(events, key=lambda event: (event['year'], event['round']))
+
+
+
+class DriverTelemetry:
+    """Columnar telemetry of a single driver.
+
+    Each channel is one contiguous float32 array covering the whole session. The samples of
+    lap ``lap_numbers[i]`` are ``[lap_offsets[i], lap_offsets[i + 1])`` in every channel, so a
+    lap lookup is a slice and never a copy.
+    """
+    CHANNELS = ('time', 'x', 'y', 'z', 'speed', 'gear', 'drs')
+    COLUMNS = {'x': 'X', 'y': 'Y', 'z': 'Z', 'speed': 'Speed', 'gear': 'nGear', 'drs': 'DRS'}
+
+    def __init__(self, code, channels, lap_numbers, lap_offsets):
+        self.code = code
+        self.channels = channels
+        self.lap_numbers = lap_numbers
+        self.lap_offsets = lap_offsets
+
+    def __len__(self):
+        return len(self.channels['time'])
+
+    def __getitem__(self, channel):
+        return self.channels[channel]
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for values in self.channels.values()) + self.lap_numbers.nbytes + self.lap_offsets.nbytes
+
+    def lap_slice(self, lap_number) -> slice:
+        i = np.searchsorted(self.lap_numbers, lap_number)
+        if i >= len(self.lap_numbers) or self.lap_numbers[i] != lap_number:
+            raise KeyError(f"No telemetry for lap {lap_number} of driver {self.code}")
+        return slice(int(self.lap_offsets[i]), int(self.lap_offsets[i + 1]))
+
+    def get_lap(self, lap_number, channel):
+        return self.channels[channel][self.lap_slice(lap_number)]
+
+    def save(self, directory):
+        SessionCache.save_arrays(directory, {**self.channels, 'lap_numbers': self.lap_numbers, 'lap_offsets': self.lap_offsets})
+
+    @classmethod
+    def load(cls, code, directory, mmap_mode='r'):
+        arrays = SessionCache.load_arrays(directory, cls.CHANNELS + ('lap_numbers', 'lap_offsets'), mmap_mode)
+        lap_numbers = arrays.pop('lap_numbers')
+        lap_offsets = arrays.pop('lap_offsets')
+        return cls(code, arrays, lap_numbers, lap_offsets)
+
+
+
+class RaceTimeline:
+    """Running order of the session sampled on a fixed time grid.
+
+    Row ``i`` holds the classification at ``time[i]``: ``order`` lists the driver indexes from the
+    leader down, ``position`` is the 0-based rank of each driver and ``gap``/``interval`` are the
+    seconds to the leader and to the car ahead, indexed like ``codes``. The row at any session
+    time is a single division, nothing is sorted during playback.
+    """
+    STEP = 0.5
+
+    def __init__(self, codes, time, order, position, gap, interval, lap):
+        self.codes = codes
+        self.time = time
+        self.order = order
+        self.position = position
+        self.gap = gap
+        self.interval = interval
+        self.lap = lap
+        self.start_time = float(time[0])
+        self.step = float(time[1] - time[0]) if len(time) > 1 else self.STEP
+
+    @staticmethod
+    def lap_progress(telemetry):
+        """Laps completed at every sample, the fraction being the distance covered in the current lap"""
+        x, y = telemetry['x'], telemetry['y']
+        distance = np.zeros(len(telemetry))
+        np.cumsum(np.hypot(np.diff(x), np.diff(y)), out=distance[1:])
+
+        offsets = telemetry.lap_offsets
+        lap_index = np.repeat(np.arange(len(telemetry.lap_numbers)), np.diff(offsets))
+        lap_start = distance[np.minimum(offsets[:-1], len(distance) - 1)]
+        lap_length = distance[np.minimum(offsets[1:], len(distance) - 1)] - lap_start
+        lap_length[lap_length <= 0] = 1.0
+
+        progress = telemetry.lap_numbers[lap_index] - 1 + (distance - lap_start[lap_index]) / lap_length[lap_index]
+        return np.maximum.accumulate(progress)
+
+    @classmethod
+    def from_telemetry(cls, drivers_data, step=STEP):
+        codes = list(drivers_data)
+        times = [drivers_data[code]['time'].astype(np.float64) for code in codes]
+        progresses = [cls.lap_progress(drivers_data[code]) for code in codes]
+
+        start_time = min(time[0] for time in times)
+        end_time = max(time[-1] for time in times)
+        grid = start_time + np.arange(int(np.ceil((end_time - start_time) / step)) + 1) * step
+
+        # Progress is held before the first and after the last sample, a retired car drops down the order
+        progress = np.stack([np.interp(grid, time, driver_progress) for time, driver_progress in zip(times, progresses)], axis=1)
+        order = np.argsort(-progress, axis=1, kind='stable')
+        position = np.argsort(order, axis=1)
+
+        # Gap to the leader is when the driver reached its progress minus when the leader first did.
+        # A driver's progress is reached at the grid time until its last sample and is frozen after,
+        # so the gaps of finished and retired cars stop growing
+        reached = np.minimum(grid[:, None], [time[-1] for time in times])
+        leader = order[:, 0]
+        gap = np.empty_like(progress)
+        for i in np.unique(leader):
+            rows = leader == i
+            # First crossing of every progress value, a stationary leader would repeat them
+            leader_progress, first = np.unique(progresses[i], return_index=True)
+            gap[rows] = reached[rows] - np.interp(progress[rows], leader_progress, times[i][first])
+        np.maximum(gap, 0.0, out=gap)
+
+        ranked_gap = np.take_along_axis(gap, order, axis=1)
+        interval = np.empty_like(gap)
+        np.put_along_axis(interval, order, np.diff(ranked_gap, axis=1, prepend=0.0), axis=1)
+
+        # The leader's progress passes the last lap once it takes the flag
+        last_lap = max(int(drivers_data[code].lap_numbers[-1]) for code in codes)
+        lap = np.minimum(np.floor(progress[np.arange(len(grid)), leader]) + 1, last_lap).astype(np.int16)
+        return cls(codes, grid, order.astype(np.int8), position.astype(np.int8), gap.astype(np.float32), interval.astype(np.float32), lap)
+
+    def __len__(self):
+        return len(self.time)
+
+    def index_at(self, session_time):
+        """Row of the last grid time at or before ``session_time``"""
+        return min(max(int((session_time - self.start_time) / self.step), 0), len(self.time) - 1)
+
+    def running_order(self, row):
+        return [self.codes[i] for i in self.order[row]]
+
+    def save(self, directory):
+        SessionCache.save_arrays(directory, {'time': self.time, 'order': self.order, 'position': self.position,
+                                             'gap': self.gap, 'interval': self.interval, 'lap': self.lap})
+
+    @classmethod
+    def load(cls, codes, directory, mmap_mode='r'):
+        arrays = SessionCache.load_arrays(directory, ('time', 'order', 'position', 'gap', 'interval', 'lap'), mmap_mode)
+        return cls(codes, **arrays)
 
 
 
 class RaceDataManager:
-    def __init__(self, year, session_number, session_type: Union[Literal['R'], Literal['S'], Literal['Q']] = 'R'):
+    SESSION_PARTS = ('laps', 'telemetry', 'weather', 'messages')
+
+    def __init__(self, year, session_number, session_type: Union[Literal['R'], Literal['S'], Literal['Q']] = 'R', use_cache=True, load=True, n_jobs=-1):
         self.year = year
         self.session_number = session_number
         self.session_type = session_type
-        self.load_session()
+        self.session = None
+        self.loaded_parts = set()
+        self.total_laps = None
+        self.use_cache = use_cache
+        self.n_jobs = n_jobs
+        self.track_layouts = {}
+        self.geometry = None
+        self.drivers_data = {}
+        self.cache = SessionCache(year, session_number, session_type)
+        # Without the cache, worker results are handed over through a temporary directory
+        self.scratch = None if use_cache else tempfile.TemporaryDirectory(prefix="f1_telemetry_", ignore_cleanup_errors=True)
+
+        if load:
+            self.load()
+
+    def load(self, progress=None):
+        """Load the whole session, from the cache when possible.
+
+        ``progress(stage, *args)`` is called from the loading thread with ``'track'`` once the
+        rotation and track layouts are known, ``'driver', code, done, total`` as soon as the
+        telemetry of a driver is available and ``'done'`` at the end.
+        """
+        if progress is None:
+            progress = lambda stage, *args: None
+
+        if self.use_cache and self.cache.exists():
+            self.load_from_cache()
+            progress('track')
+            codes = list(self.drivers_data)
+            for done, code in enumerate(codes, 1):
+                progress('driver', code, done, len(codes))
+            progress('done')
+            return
+
+        self.load_session('laps', 'telemetry')
         self.load_circuit_rotation()
         self.load_drivers()
-        self._load_telemetry()
+        for lap_type in ('fast', 'box'):
+            try:
+                self.get_track_layout(lap_type)
+            except IndexError:
+                print(f"No {lap_type} lap to build the track layout from")
+        if 'fast' in self.track_layouts:
+            self.geometry = self.get_track_geometry()
+        progress('track')
+        self._load_telemetry(progress)
+        self.timeline = RaceTimeline.from_telemetry(self.drivers_data)
+        if self.use_cache:
+            self.save_to_cache()
+        progress('done')
+
+    def load_session(self, *parts):
+        """Load the FastF1 session with the given parts, each part is only loaded the first time it is needed"""
+        if any(part not in self.SESSION_PARTS for part in parts):
+            raise ValueError(f"Session parts must be among: {', '.join(self.SESSION_PARTS)}")
+        if 'telemetry' in parts:
+            # Telemetry is split on the laps
+            parts = ('laps',) + parts
 
-    def load_session(self):
-        self.session = fastf1.get_session(self.year, self.session_number, self.session_type)
-        self.session.load(telemetry=True, weather=True)
-        self.event_name = self.session.event['EventName']
-        self.date = self.session.date
+        if self.session is None:
+            self.session = fastf1.get_session(self.year, self.session_number, self.session_type)
+            self.session.load(**{part: part in parts for part in self.SESSION_PARTS})
+            self.loaded_parts = set(parts)
+            self.event_name = self.session.event['EventName']
+            self.date = self.session.date
+            return self.session
+
+        missing = [part for part in self.SESSION_PARTS if part in parts and part not in self.loaded_parts]
+        if missing:
+            # Session.load only parses the requested parts and keeps the ones already loaded,
+            # then flags the laps deleted by race control again
+            self.session.load(**{part: part in missing for part in self.SESSION_PARTS})
+        self.loaded_parts.update(missing)
+        return self.session
 
     def load_circuit_rotation(self):
+        self.load_session('laps', 'telemetry')
         self.circuit = self.session.get_circuit_info()
         self.rotation = self.circuit.rotation
 
     def load_drivers(self):
+        self.load_session()
         self.drivers = self.session.drivers
         self.drivers_codes = {num: self.session.get_driver(num)['Abbreviation'] for num in self.drivers}
 
+    def load_from_cache(self):
+        meta = self.cache.load_meta()
+        self.event_name = meta['event_name']
+        self.date = pd.Timestamp(meta['date'])
+        self.rotation = meta['rotation']
+        self.total_laps = meta['total_laps']
+        self.drivers = meta['drivers']
+        self.drivers_codes = meta['drivers_codes']
+        for lap_type in ('fast', 'box'):
+            points = self.cache.load_track(lap_type)
+            if points is not None:
+                self.track_layouts[lap_type] = pd.DataFrame(points, columns=["X", "Y"])
+        try:
+            self.geometry = TrackGeometry.load(self.cache.geometry_path)
+        except FileNotFoundError:
+            if 'fast' in self.track_layouts:
+                self.get_track_geometry().save(self.cache.geometry_path)
+        self.drivers_data = {code: DriverTelemetry.load(code, self.cache.driver_path(code)) for code in meta['telemetry_codes']}
+        try:
+            self.timeline = RaceTimeline.load(meta['telemetry_codes'], self.cache.timeline_path)
+        except FileNotFoundError:
+            self.timeline = RaceTimeline.from_telemetry(self.drivers_data)
+            self.timeline.save(self.cache.timeline_path)
+
+    def save_to_cache(self):
+        for lap_type, layout in self.track_layouts.items():
+            self.cache.save_track(lap_type, layout.to_numpy(dtype=float))
+        if self.geometry is not None:
+            self.geometry.save(self.cache.geometry_path)
+        for code, telemetry in self.drivers_data.items():
+            # Loaded with the cache enabled, the telemetry is already there and memory-mapped
+            if self.telemetry_directory(code) != self.cache.driver_path(code):
+                telemetry.save(self.cache.driver_path(code))
+        self.timeline.save(self.cache.timeline_path)
+        total_laps = self.get_max_lap()
+        self.cache.save_meta({
+            'event_name': self.event_name,
+            'date': self.date.isoformat(),
+            'rotation': float(self.rotation),
+            'total_laps': None if total_laps is None else int(total_laps),
+            'drivers': list(self.drivers),
+            'drivers_codes': self.drivers_codes,
+            'telemetry_codes': list(self.drivers_data),
+        })
+
     def get_track_layout(self, lap_type='fast'):
+        if lap_type in self.track_layouts:
+            return self.track_layouts[lap_type]
+        self.load_session('laps', 'telemetry')
+
         if lap_type == 'fast':
             lap = self.session.laps.pick_fastest()
         elif lap_type == 'box':
@@ -46,39 +426,127 @@ class RaceDataManager:
         circuit_info = self.session.get_circuit_info()
 
         track = lap.get_pos_data().loc[:, ('X', 'Y')]
-        track = track._append(track.iloc[:5], ignore_index=True)
+        track = track._append(track.iloc[:LAYOUT_CLOSING_POINTS], ignore_index=True)
         rotated_track = track
         rotated_track.columns = ["X", "Y"]
+        self.track_layouts[lap_type] = rotated_track
         return rotated_track
     
+    def get_track_geometry(self):
+        """Resampled centreline, normals, curvature and edges of the circuit, built from the fastest lap"""
+        if self.geometry is None:
+            layout = self.get_track_layout('fast').to_numpy(dtype=float)[:-LAYOUT_CLOSING_POINTS]
+            self.geometry = TrackGeometry.from_layout(layout, self.rotation)
+        return self.geometry
+
+    def project_driver(self, code):
+        """Arc length along the centreline and lateral offset of every position sample of a driver"""
+        telemetry = self.drivers_data[code]
+        return self.get_track_geometry().project(np.column_stack((telemetry['x'], telemetry['y'])))
+
     def get_weather(self):
-        return self.session.weather_data
+        return self.load_session('weather').weather_data
+
+    def get_race_control_messages(self):
+        return self.load_session('messages').race_control_messages
     
     def get_max_lap(self):
-        return self.session.total_laps
+        if self.total_laps is None:
+            if self.use_cache and self.session is None and self.cache.exists():
+                self.total_laps = self.cache.load_meta()['total_laps']
+            else:
+                self.total_laps = self.load_session('laps').total_laps
+        return self.total_laps
     
-    def load_driver_telemetry(self, driver_code, laps_df):
-        print(f"Getting telemetry from driver {driver_code}")
-        x, y = [], []
-        for i, lap in laps_df.iterrows():
-            telemetry = lap.get_telemetry()
-            if telemetry.empty:
-                continue
-            x.append(telemetry['X'].to_numpy())
-            y.append(telemetry['Y'].to_numpy())
-            return {'code': driver_code, 'data': {'x': x, 'y': y}, 'lap': i}
-        
+    def driver_telemetry_arrays(self, driver, code):
+        """Raw arrays of one driver, sliced once from the session wide car and position data"""
+        self.load_session('laps', 'telemetry')
+        if driver not in self.session.pos_data or driver not in self.session.car_data:
+            return None
+        pos = self.session.pos_data[driver]
+        car = self.session.car_data[driver]
+        columns = DriverTelemetry.COLUMNS
+        laps = self.session.laps.pick_drivers(driver)
+        laps = laps[laps['LapStartTime'].notna() & laps['Time'].notna()]
+        return (code,
+                session_seconds(pos['SessionTime']), pos.loc[:, [columns[c] for c in ('x', 'y', 'z')]].to_numpy(dtype=np.float64),
+                session_seconds(car['SessionTime']), car.loc[:, [columns[c] for c in ('speed', 'gear', 'drs')]].to_numpy(dtype=np.float64),
+                laps['LapNumber'].to_numpy(dtype=np.int32), session_seconds(laps['LapStartTime']), session_seconds(laps['Time']))
 
-    def _load_telemetry(self):
-        self.drivers_data = {}
+    def telemetry_directory(self, code):
+        if self.scratch is None:
+            return self.cache.driver_path(code)
+        return os.path.join(self.scratch.name, code)
 
+    def _load_telemetry(self, progress=None):
         print(f"Getting data from {len(self.drivers)}...")
 
-        driver_arg = [(code, self.session.laps.pick_drivers(driver)) for driver, code in self.drivers_codes.items()]
-        self.results = Parallel(n_jobs=-1)(delayed(self.load_driver_telemetry)(code, laps) for code, laps in driver_arg)
+        # Workers only receive numpy arrays and write their result to .npy files, the parent
+        # memory-maps them instead of unpickling a copy of every channel
+        driver_args = [self.driver_telemetry_arrays(driver, code) for driver, code in self.drivers_codes.items()]
+        driver_args = [args for args in driver_args if args is not None]
+        results = Parallel(n_jobs=self.n_jobs, return_as='generator_unordered')(delayed(store_driver_telemetry)(self.telemetry_directory(args[0]), *args) for args in driver_args)
+        # Filled as the workers finish so a progress listener can already use the driver
+        self.drivers_data = {}
+        for done, code in enumerate(results, 1):
+            if code is None:
+                continue
+            self.drivers_data[code] = DriverTelemetry.load(code, self.telemetry_directory(code))
+            if progress is not None:
+                progress('driver', code, done, len(driver_args))
+        self.drivers_data = {code: self.drivers_data[code] for code in self.drivers_codes.values() if code in self.drivers_data}
+
+
+def session_seconds(values):
+    return values.dt.total_seconds().to_numpy(dtype=np.float64)
+
+
+def store_driver_telemetry(directory, *args):
+    """Worker side of the loader, only the driver code goes back to the parent"""
+    telemetry = extract_driver_telemetry(*args)
+    if telemetry is None:
+        return None
+    telemetry.save(directory)
+    return telemetry.code
+
+
+def extract_driver_telemetry(code, pos_time, pos_xyz, car_time, car_values, lap_numbers, lap_start, lap_end):
+    """Merge the position and car samples of one driver and split them into laps with time masks.
+
+    Like ``Lap.get_telemetry`` the samples of both sources are merged on their union of
+    timestamps: coordinates and speed are interpolated, gear and DRS hold their last value.
+    """
+    if len(lap_numbers) == 0 or len(pos_time) == 0 or len(car_time) == 0:
+        return None
+    print(f"Getting telemetry from driver {code}")
+
+    time = np.union1d(pos_time, car_time)
+    time = time[(time >= lap_start[0]) & (time < lap_end[-1])]
+
+    # Lap i covers [lap_start[i], lap_end[i]), samples between an end and the next start are dropped
+    lap_index = np.searchsorted(lap_start, time, side='right') - 1
+    keep = (lap_index >= 0) & (time < lap_end[np.maximum(lap_index, 0)])
+    time, lap_index = time[keep], lap_index[keep]
+    if len(time) == 0:
+        return None
+
+    channels = {'time': time.astype(np.float32)}
+    for i, channel in enumerate(('x', 'y', 'z')):
+        channels[channel] = np.interp(time, pos_time, pos_xyz[:, i]).astype(np.float32)
+    channels['speed'] = np.interp(time, car_time, car_values[:, 0]).astype(np.float32)
+    held = np.clip(np.searchsorted(car_time, time, side='right') - 1, 0, len(car_time) - 1)
+    channels['gear'] = car_values[held, 1].astype(np.float32)
+    channels['drs'] = car_values[held, 2].astype(np.float32)
+
+    # Laps without a single sample are dropped from the index
+    lap_sizes = np.bincount(lap_index, minlength=len(lap_numbers))
+    present = lap_sizes > 0
+    lap_offsets = np.concatenate(([0], np.cumsum(lap_sizes[present]))).astype(np.int32)
+    return DriverTelemetry(code, channels, lap_numbers[present], lap_offsets)
+
 
 if __name__ == "__main__":
-    rdm = RaceDataManager(2021, 7, 'R')
+    rdm = RaceDataManager(2021, 7, 'R', load=False)
     """ print(rdm.session)
     print(rdm.drivers_codes)
     print(rdm.get_weather()) """
@@ -0,0 +1,371 @@
+import numpy as np
+from scipy.spatial import cKDTree
+from session_cache import SessionCache
+
+
+def rotation_matrix(degrees):
+    """2x2 counterclockwise rotation, angles are in degrees like FastF1's circuit rotation"""
+    angle = np.radians(degrees)
+    cos, sin = np.cos(angle), np.sin(angle)
+    return np.array([[cos, -sin], [sin, cos]])
+
+
+def output_buffer(points, out):
+    if out is None:
+        out = np.empty(np.shape(points), dtype=np.result_type(np.asarray(points).dtype, np.float32))
+    return out
+
+
+def rotate(points, degrees, center=None, out=None):
+    """Rotate (N, 2) points by ``degrees`` around ``center`` (the origin by default).
+
+    float32 input stays float32, ``out`` can be the input itself.
+    """
+    out = output_buffer(points, out)
+    linear = rotation_matrix(degrees).T.astype(out.dtype)
+    if center is None:
+        np.matmul(points, linear, out=out)
+    else:
+        center = np.asarray(center, dtype=out.dtype)
+        np.subtract(points, center, out=out)
+        np.matmul(out, linear, out=out)
+        out += center
+    return out
+
+
+def scale(points, factor, offset=(0.0, 0.0), out=None):
+    """``points * factor + offset``, ``factor`` being a scalar or one factor per axis"""
+    out = output_buffer(points, out)
+    np.multiply(points, factor, out=out)
+    out += np.asarray(offset, dtype=out.dtype)
+    return out
+
+
+def fit(points, width, height):
+    """Uniform scale and offset centering the bounds of (N, 2) points in a width x height area"""
+    points = np.asarray(points)
+    x_min, y_min = points.min(axis=0)
+    x_max, y_max = points.max(axis=0)
+    scale_x = width / (x_max - x_min) if x_max != x_min else width
+    scale_y = height / (y_max - y_min) if y_max != y_min else height
+    factor = min(scale_x, scale_y)
+    offset = np.array([(width - (x_max - x_min) * factor) / 2 - x_min * factor,
+                       (height - (y_max - y_min) * factor) / 2 - y_min * factor])
+    return factor, offset
+
+
+def project(points, matrix, out=None):
+    """Apply a 3x3 affine matrix to (N, 2) points"""
+    out = output_buffer(points, out)
+    matrix = np.asarray(matrix)
+    np.matmul(points, matrix[:2, :2].T.astype(out.dtype), out=out)
+    out += matrix[:2, 2].astype(out.dtype)
+    return out
+
+
+class TrackGeometry:
+    """Centreline of a circuit resampled at a constant spacing, in world coordinates.
+
+    The loop is closed and ``points[i]`` lies at arc length ``s[i]``. Tangents, normals and
+    curvature are computed once with periodic differences, the edges are the centreline offset
+    by half the track width along the normals.
+    """
+    SPACING = 50.0
+    TRACK_WIDTH = 200.0
+    # Window of the smoothing before differentiation, in raw samples of the source lap
+    SMOOTHING_SAMPLES = 3
+
+    def __init__(self, points, rotation=0.0, track_width=TRACK_WIDTH, smoothing=5):
+        self.points = np.ascontiguousarray(points, dtype=np.float64)
+        self.rotation = float(rotation)
+        self.track_width = float(track_width)
+        self.smoothing = int(smoothing)
+
+        segments = np.hypot(*(np.roll(self.points, -1, axis=0) - self.points).T)
+        self.s = np.concatenate(([0.0], np.cumsum(segments[:-1])))
+        self.length = float(segments.sum())
+        self.spacing = self.length / len(self.points)
+
+        # Derivatives of a smoothed copy, the resampled lap is piecewise linear between raw samples
+        kernel = np.ones(self.smoothing) / self.smoothing
+        pad = self.smoothing // 2
+        wrapped = np.concatenate((self.points[-pad:], self.points, self.points[:pad])) if pad else self.points
+        smooth = np.stack([np.convolve(wrapped[:, i], kernel, mode='valid') for i in range(2)], axis=1)
+        forward, backward = np.roll(smooth, -1, axis=0), np.roll(smooth, 1, axis=0)
+        d1 = (forward - backward) / (2 * self.spacing)
+        d2 = (forward - 2 * smooth + backward) / self.spacing ** 2
+
+        speed = np.hypot(d1[:, 0], d1[:, 1])
+        speed[speed == 0] = 1.0
+        self.tangents = d1 / speed[:, None]
+        self.normals = np.stack((-self.tangents[:, 1], self.tangents[:, 0]), axis=1)
+        self.curvature = (d1[:, 0] * d2[:, 1] - d1[:, 1] * d2[:, 0]) / speed ** 3
+
+        # The normals point left of the travel direction, that is inside only on a counterclockwise loop
+        x, y = self.points.T
+        signed_area = np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))
+        half_width = self.track_width / 2 if signed_area >= 0 else -self.track_width / 2
+        self.inner = self.points + self.normals * half_width
+        self.outer = self.points - self.normals * half_width
+        self._projector = None
+
+    @classmethod
+    def from_layout(cls, points, rotation=0.0, spacing=SPACING, track_width=TRACK_WIDTH):
+        """Resample a lap of raw (X, Y) positions, the end of the lap is joined back to its start"""
+        points = np.asarray(points, dtype=np.float64)
+        keep = np.ones(len(points), dtype=bool)
+        keep[1:] = np.any(np.diff(points, axis=0) != 0, axis=1)
+        points = points[keep]
+        if len(points) < 3:
+            raise ValueError("A track layout needs at least 3 distinct points")
+
+        closed = np.vstack((points, points[:1]))
+        s = np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(closed, axis=0).T))))
+        count = max(int(round(s[-1] / spacing)), 3)
+        samples = np.linspace(0.0, s[-1], count, endpoint=False)
+        resampled = np.stack([np.interp(samples, s, closed[:, i]) for i in range(2)], axis=1)
+
+        raw_spacing = np.median(np.diff(s))
+        smoothing = int(cls.SMOOTHING_SAMPLES * raw_spacing / (s[-1] / count)) // 2 * 2 + 1
+        return cls(resampled, rotation, track_width, min(max(smoothing, 5), count // 2 * 2 - 1))
+
+    def __len__(self):
+        return len(self.points)
+
+    def position_at(self, s):
+        """(N, 2) centreline points at arc lengths ``s``, wrapping around the lap"""
+        s = np.mod(np.asarray(s, dtype=np.float64), self.length)
+        closed_s = np.append(self.s, self.length)
+        return np.stack([np.interp(s, closed_s, np.append(self.points[:, i], self.points[0, i])) for i in range(2)], axis=-1)
+
+    @property
+    def projector(self) -> 'TrackProjector':
+        if self._projector is None:
+            self._projector = TrackProjector(self)
+        return self._projector
+
+    def project(self, xy):
+        """Arc length and signed lateral offset (positive along the normals) of (N, 2) world positions"""
+        return self.projector.project(xy)
+
+    def closed(self, points=None):
+        """``points`` (the centreline by default) with its first point repeated, ready to draw as a strip"""
+        points = self.points if points is None else points
+        return np.vstack((points, points[:1]))
+
+    def save(self, directory):
+        SessionCache.save_arrays(directory, {'points': self.points, 'params': np.array([self.rotation, self.track_width, self.smoothing])})
+
+    @classmethod
+    def load(cls, directory):
+        arrays = SessionCache.load_arrays(directory, ('points', 'params'), mmap_mode=None)
+        rotation, track_width, smoothing = arrays['params']
+        return cls(arrays['points'], rotation, track_width, smoothing)
+
+
+class TrackProjector:
+    """Batched projection of world positions onto the centreline of a TrackGeometry.
+
+    A KD-tree over the centreline vertices finds the nearest vertex of every position, the
+    position is then projected on the two segments around that vertex and the closest
+    projection is kept.
+    """
+    def __init__(self, geometry: TrackGeometry):
+        self.geometry = geometry
+        self.tree = cKDTree(geometry.points)
+        self.starts = geometry.points
+        self.segments = np.roll(geometry.points, -1, axis=0) - geometry.points
+        self.segment_lengths = np.hypot(self.segments[:, 0], self.segments[:, 1])
+        self.segment_lengths[self.segment_lengths == 0] = 1.0
+
+    def project_on_segment(self, xy, segment):
+        """Distance, arc length and signed offset of ``xy`` projected on the given segments"""
+        relative = xy - self.starts[segment]
+        direction = self.segments[segment] / self.segment_lengths[segment, None]
+        along = np.clip(np.einsum('ij,ij->i', relative, direction), 0.0, self.segment_lengths[segment])
+        offset = relative - direction * along[:, None]
+        lateral = direction[:, 0] * relative[:, 1] - direction[:, 1] * relative[:, 0]
+        return np.hypot(offset[:, 0], offset[:, 1]), self.geometry.s[segment] + along, lateral
+
+    def project(self, xy):
+        """``(s, lateral_offset)`` of (N, 2) world positions, ``s`` in ``[0, length)``"""
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        _, nearest = self.tree.query(xy, workers=-1)
+        previous = (nearest - 1) % len(self.starts)
+
+        distance, s, lateral = self.project_on_segment(xy, nearest)
+        previous_distance, previous_s, previous_lateral = self.project_on_segment(xy, previous)
+        use_previous = previous_distance < distance
+        s[use_previous] = previous_s[use_previous]
+        lateral[use_previous] = previous_lateral[use_previous]
+        return np.mod(s, self.geometry.length), lateral
+
+
+class ViewTransform:
+    """World (X, Y) to screen as a single 3x3 affine matrix.
+
+    The matrix composes the circuit rotation (degrees, as given by FastF1), the fit of the
+    track bounds into the window, the zoom and the drag. It is recomputed only after one of
+    them changed and ``apply`` writes into a caller provided buffer, so transforming the cars
+    every frame allocates nothing.
+    """
+    def __init__(self, width, height, rotation=0.0):
+        self.width, self.height = width, height
+        self.rotation = float(rotation)
+        self.fit_points = None
+        self.zoom = (1.0, 1.0)
+        self.drag = (0.0, 0.0)
+        self._matrix = None
+
+    def _update(self, name, value):
+        if getattr(self, name) != value:
+            setattr(self, name, value)
+            self._matrix = None
+
+    def set_rotation(self, degrees):
+        self._update('rotation', float(degrees))
+
+    def set_size(self, width, height):
+        self._update('width', width)
+        self._update('height', height)
+
+    def set_zoom(self, zoom_x, zoom_y=None):
+        self._update('zoom', (zoom_x, zoom_x if zoom_y is None else zoom_y))
+
+    def set_drag(self, drag_x, drag_y):
+        self._update('drag', (drag_x, drag_y))
+
+    def fit(self, points):
+        """Fit these world points (usually the track) into the window once rotated"""
+        self.fit_points = np.asarray(points, dtype=np.float64)
+        self._matrix = None
+
+    def compose(self):
+        rotation = np.eye(3)
+        rotation[:2, :2] = rotation_matrix(self.rotation)
+        fitting = np.eye(3)
+        if self.fit_points is not None:
+            factor, offset = fit(rotate(self.fit_points, self.rotation), self.width, self.height)
+            fitting[0, 0] = fitting[1, 1] = factor
+            fitting[:2, 2] = offset
+        view = np.diag([self.zoom[0], self.zoom[1], 1.0])
+        view[:2, 2] = self.drag
+        return view @ fitting @ rotation
+
+    @property
+    def matrix(self):
+        if self._matrix is None:
+            self._matrix = self.compose()
+            # Row vector form of the matrix, one copy per output precision
+            self._linear = {np.dtype(np.float64): np.ascontiguousarray(self._matrix[:2, :2].T)}
+            self._linear[np.dtype(np.float32)] = self._linear[np.dtype(np.float64)].astype(np.float32)
+            self._offset = {dtype: self._matrix[:2, 2].astype(dtype) for dtype in self._linear}
+        return self._matrix
+
+    def apply(self, points, out=None):
+        """Transform (N, 2) points into ``out`` (allocated as float32 when missing) and return it"""
+        self.matrix
+        if out is None:
+            out = np.empty(np.shape(points), dtype=np.float32)
+        dtype = out.dtype if out.dtype in self._linear else np.dtype(np.float64)
+        np.matmul(points, self._linear[dtype], out=out)
+        out += self._offset[dtype]
+        return out
+
+
+if __name__ == "__main__":
+    import time
+
+    def rotate_loop(points, degrees, center):
+        """Per-point rotation, as the renderers used to do it"""
+        cos_r, sin_r = np.cos(np.radians(degrees)), np.sin(np.radians(degrees))
+        rotated = []
+        for x, y in points:
+            tx, ty = x - center[0], y - center[1]
+            rotated.append((tx * cos_r - ty * sin_r + center[0], tx * sin_r + ty * cos_r + center[1]))
+        return rotated
+
+    def throughput(function, count, repeat=5):
+        best = min(timed(function) for _ in range(repeat))
+        return count / best / 1e6
+
+    def timed(function):
+        start = time.perf_counter()
+        function()
+        return time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    points = rng.normal(0.0, 5000.0, (1_000_000, 2))
+    points32 = points.astype(np.float32)
+    out, out32 = np.empty_like(points), np.empty_like(points32)
+    center = points.mean(axis=0)
+    matrix = np.eye(3)
+    matrix[:2, :2] = rotation_matrix(30.0) * 0.05
+
+    def main_rotate(xy, *, angle):
+        """Main.rotate before it moved here, radians and a row vector matrix"""
+        rot_mat = np.array([[np.cos(angle), np.sin(angle)],
+                            [-np.sin(angle), np.cos(angle)]])
+        return np.matmul(xy, rot_mat)
+
+    sample, sample32 = points[:1000], points32[:1000]
+    for degrees in (0.0, 30.0, -92.0, 180.0, 271.5):
+        # Main.DrawTrack used to convert FastF1's degrees itself before calling Main.rotate
+        assert np.allclose(main_rotate(sample, angle=degrees / 180 * np.pi), rotate(sample, degrees))
+        assert np.allclose(rotate_loop(sample.tolist(), degrees, center), rotate(sample, degrees, center))
+    assert np.allclose(rotate(rotate(sample, 40.0, center), -40.0, center), sample)
+
+    # float32 stays float32 and the input can be its own output
+    assert rotate(sample32, 30.0, center).dtype == np.float32
+    assert scale(sample32, 0.5, (1.0, 2.0)).dtype == np.float32
+    assert project(sample32, matrix).dtype == np.float32
+    for transform in (lambda p, out=None: rotate(p, 30.0, center, out),
+                      lambda p, out=None: scale(p, (0.5, 2.0), (10.0, -3.0), out),
+                      lambda p, out=None: project(p, matrix, out)):
+        for values in (sample, sample32):
+            expected = transform(values)
+            aliased = values.copy()
+            assert transform(aliased, aliased) is aliased
+            assert np.allclose(aliased, expected, rtol=1e-5, atol=1e-2)
+    assert np.allclose(scale(sample, (0.5, 2.0), (10.0, -3.0)), sample * [0.5, 2.0] + [10.0, -3.0])
+    assert np.allclose(project(sample, matrix), rotate(sample, 30.0) * 0.05)
+
+    # fit centres the bounds and touches the limiting axis
+    factor, offset = fit(sample, 1280, 720)
+    fitted = scale(sample, factor, offset)
+    low, high = fitted.min(axis=0), fitted.max(axis=0)
+    assert np.all(low >= -1e-6) and np.all(high <= np.array([1280, 720]) + 1e-6)
+    assert np.allclose(low + high, [1280, 720])
+    assert np.isclose(high[0] - low[0], 1280) or np.isclose(high[1] - low[1], 720)
+
+    # ViewTransform.apply is rotate, fit, zoom and drag applied one after the other
+    view = ViewTransform(1280, 720, 30.0)
+    view.fit(sample)
+    view.set_zoom(1.5, 0.75)
+    view.set_drag(40.0, -25.0)
+    factor, offset = fit(rotate(sample, 30.0), 1280, 720)
+    expected = scale(scale(rotate(sample, 30.0), factor, offset), (1.5, 0.75), (40.0, -25.0))
+    assert np.allclose(view.apply(sample, np.empty_like(sample)), expected)
+    assert np.allclose(project(sample, view.matrix), expected)
+    assert view.apply(sample).dtype == np.float32
+    assert np.allclose(view.apply(sample32), expected, rtol=1e-5, atol=1e-2)
+    aliased = sample.copy()
+    assert view.apply(aliased, aliased) is aliased and np.allclose(aliased, expected)
+    # The inner edge stays inside whichever way the loop runs
+    angles = np.linspace(0.0, 2 * np.pi, 400, endpoint=False)
+    ellipse = np.stack((3000.0 * np.cos(angles), 1500.0 * np.sin(angles)), axis=1)
+    for loop in (ellipse, ellipse[::-1]):
+        track = TrackGeometry.from_layout(loop)
+        assert np.all(np.hypot(*track.inner.T) < np.hypot(*track.outer.T))
+    print("Geometry checks passed")
+
+    loop_points = points[:100_000].tolist()
+
+    print("Million points per second")
+    print(f"  python loop      {throughput(lambda: rotate_loop(loop_points, 30.0, center), len(loop_points), repeat=1):8.1f}")
+    print(f"  rotate float64   {throughput(lambda: rotate(points, 30.0, center, out), len(points)):8.1f}")
+    print(f"  rotate float32   {throughput(lambda: rotate(points32, 30.0, center, out32), len(points)):8.1f}")
+    print(f"  project float32  {throughput(lambda: project(points32, matrix, out32), len(points)):8.1f}")
+    view = ViewTransform(1280, 720, 30.0)
+    view.fit(points[:1000])
+    print(f"  view float32     {throughput(lambda: view.apply(points32, out32), len(points)):8.1f}")
@@ -0,0 +1,67 @@
+class PlaybackClock:
+    """Replay time advanced in fixed steps, independent of the frame rate.
+
+    Wall time is accumulated and consumed in steps of ``step`` seconds, each one moving the
+    replay ``step * rate`` seconds forward. ``time`` is interpolated between the last two steps
+    with the wall time left in the accumulator, so motion is smooth at any refresh rate. Frame
+    time is capped at ``max_frame_time``, a hitch costs a few steps instead of a jump.
+    """
+    MIN_RATE = 0.25
+    MAX_RATE = 128.0
+
+    def __init__(self, step=1 / 60, start=0.0, end=None, max_frame_time=0.25):
+        if step <= 0:
+            raise ValueError("step must be positive")
+        self.step = step
+        self.start = start
+        self.end = end
+        self.max_frame_time = max_frame_time
+        self.rate = 1.0
+        self.paused = True
+        self.seek(start)
+
+    def clamp(self, replay_time):
+        replay_time = max(replay_time, self.start)
+        if self.end is not None:
+            replay_time = min(replay_time, self.end)
+        return replay_time
+
+    def seek(self, replay_time):
+        self.previous = self.current = self.clamp(replay_time)
+        self.accumulator = 0.0
+
+    def set_rate(self, rate):
+        if not self.MIN_RATE <= rate <= self.MAX_RATE:
+            raise ValueError(f"Playback rate must be between {self.MIN_RATE} and {self.MAX_RATE}")
+        self.rate = rate
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    def toggle(self):
+        self.paused = not self.paused
+
+    def tick(self, delta_time):
+        """Consume ``delta_time`` seconds of wall time, returns the number of steps taken"""
+        if self.paused:
+            return 0
+        self.accumulator += min(delta_time, self.max_frame_time)
+        steps = int(self.accumulator / self.step)
+        if steps:
+            self.accumulator -= steps * self.step
+            self.previous = self.clamp(self.current + (steps - 1) * self.step * self.rate)
+            self.current = self.clamp(self.current + steps * self.step * self.rate)
+        if self.end is not None and self.current >= self.end:
+            self.accumulator = 0.0
+            self.previous = self.current
+            self.paused = True
+        return steps
+
+    @property
+    def time(self):
+        """Replay time to render, between the last two steps"""
+        alpha = self.accumulator / self.step
+        return self.previous + (self.current - self.previous) * alpha
@@ -0,0 +1,105 @@
+import numpy as np
+
+
+class PositionEngine:
+    """Interpolated (x, y) of every driver at an arbitrary session time.
+
+    The time array of driver ``i`` is shifted by ``i * span`` and all drivers are concatenated,
+    which gives one globally monotonic array: a single ``np.searchsorted`` finds the bracketing
+    samples of every driver at once, then the positions are linearly interpolated in one go.
+    """
+    def __init__(self, drivers_data):
+        self.codes = list(drivers_data)
+        telemetries = [drivers_data[code] for code in self.codes]
+        if not telemetries:
+            raise ValueError("No telemetry to build the position engine from")
+
+        lengths = np.array([len(t) for t in telemetries])
+        self.first = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        self.last = self.first + lengths - 1
+        self.limit = np.maximum(self.last - 1, self.first)
+
+        self.start_time = min(float(t['time'][0]) for t in telemetries)
+        self.end_time = max(float(t['time'][-1]) for t in telemetries)
+        self.span = self.end_time - self.start_time + 1.0
+        self.offsets = np.arange(len(telemetries)) * self.span
+
+        # Trailing +inf lets a cursor always peek at the next key
+        self.keys = np.concatenate([t['time'].astype(np.float64) - self.start_time + offset for t, offset in zip(telemetries, self.offsets)] + [[np.inf]])
+        self.xy = np.empty((len(self.keys) - 1, 2), dtype=np.float32)
+        self.xy[:, 0] = np.concatenate([t['x'] for t in telemetries])
+        self.xy[:, 1] = np.concatenate([t['y'] for t in telemetries])
+
+        self._out = np.empty((len(self.codes), 2), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def query(self, session_time):
+        """``session_time`` expressed in the shifted time of every driver"""
+        return min(max(session_time - self.start_time, 0.0), self.span - 1.0) + self.offsets
+
+    def index_at(self, session_time):
+        """Index of the last sample at or before ``session_time`` for every driver, in the concatenated arrays"""
+        idx = np.searchsorted(self.keys, self.query(session_time), side='right') - 1
+        return np.clip(idx, self.first, self.limit)
+
+    def interpolate(self, session_time, i0, out=None):
+        """(N, 2) positions at ``session_time`` given the left bracketing sample ``i0`` of every driver"""
+        if out is None:
+            out = self._out
+        i1 = np.minimum(i0 + 1, self.last)
+        t0 = self.keys[i0]
+        dt = self.keys[i1] - t0
+        dt[dt <= 0] = np.inf
+        frac = (self.query(session_time) - t0) / dt
+        np.clip(frac, 0.0, 1.0, out=frac)
+        p0 = self.xy[i0]
+        np.multiply(self.xy[i1] - p0, frac[:, None], out=out)
+        out += p0
+        return out
+
+    def positions_at(self, session_time, out=None):
+        """(N, 2) float32 positions of all drivers, in ``codes`` order. Positions are held before the first and after the last sample"""
+        return self.interpolate(session_time, self.index_at(session_time), out)
+
+
+class PlaybackSampler:
+    """Cursor based sampling of a PositionEngine for sequential frames.
+
+    During playback the session time only moves forward by a few samples per frame, so each
+    driver keeps a cursor on its left bracketing sample. A frame moves every cursor with one
+    count over the next ``window`` keys, whatever the playback rate up to ``window`` samples
+    per frame (about 128x at 60 fps on 8 Hz telemetry). Seeking, playing backwards or moving
+    further than the window falls back to a search.
+    """
+    def __init__(self, engine: PositionEngine, window=32):
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self.engine = engine
+        self.window = window
+        self.steps = np.arange(1, window + 1)
+        self.seek(engine.start_time)
+
+    def seek(self, session_time):
+        self.time = session_time
+        self.cursor = self.engine.index_at(session_time)
+
+    def advance(self, session_time):
+        keys = self.engine.keys
+        query = self.engine.query(session_time)
+        # Keys are globally increasing, a window running into the next driver only sees larger keys
+        ahead = np.minimum(self.cursor[:, None] + self.steps, len(keys) - 1)
+        moves = np.count_nonzero(keys[ahead] <= query[:, None], axis=1)
+        cursor = np.minimum(self.cursor + moves, self.engine.limit)
+        if np.any((moves == self.window) & (cursor < self.engine.limit)):
+            cursor = self.engine.index_at(session_time)
+        self.cursor = cursor
+        self.time = session_time
+
+    def sample(self, session_time, out=None):
+        if session_time < self.time:
+            self.seek(session_time)
+        else:
+            self.advance(session_time)
+        return self.engine.interpolate(session_time, self.cursor, out)
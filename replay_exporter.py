@@ -0,0 +1,111 @@
+import os
+# Must be set before arcade is imported, the replay then renders into an offscreen EGL surface
+os.environ.setdefault("ARCADE_HEADLESS", "1")
+
+import shutil
+import subprocess
+import time
+import numpy as np
+from PIL import Image
+from Race_replay_window import RaceReplay
+from f1_data_manager import ScheduleDataManager
+
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.mov', '.webm')
+
+
+class ReplayExporter:
+    """Render a RaceReplay frame by frame on a fixed clock, without a display.
+
+    Frame ``i`` shows the race ``start + i * speed / fps`` seconds in, whatever the time it took to
+    render, so the export runs as fast as the GL context allows. Frames are piped raw to ffmpeg
+    for a video, or written as a PNG sequence.
+    """
+    def __init__(self, replay: RaceReplay, fps=30, speed=1.0):
+        if fps <= 0 or speed <= 0:
+            raise ValueError("fps and speed must be positive")
+        self.replay = replay
+        self.fps = fps
+        self.speed = speed
+        replay.wait_until_loaded()
+        # The replay starts right away, the start lights are part of the interactive procedure
+        replay.light.toggle_visibility(False)
+        # The debug text is refreshed by on_update, which the export never runs
+        replay.debug.visible = False
+
+    @property
+    def size(self):
+        return self.replay.ctx.screen.width, self.replay.ctx.screen.height
+
+    def frame_times(self, start=0.0, end=None):
+        if end is None:
+            end = self.replay.positions.end_time - self.replay.positions.start_time
+        return start + np.arange(int((end - start) * self.fps / self.speed)) * self.speed / self.fps
+
+    def render(self, race_time) -> bytes:
+        """RGB pixels of the replay at ``race_time``, bottom row first"""
+        self.replay.clock.seek(race_time)
+        self.replay.on_draw()
+        return self.replay.ctx.screen.read(components=3)
+
+    def export(self, path, start=0.0, end=None):
+        times = self.frame_times(start, end)
+        if path.lower().endswith(VIDEO_EXTENSIONS):
+            writer = self.video_writer(path)
+        else:
+            os.makedirs(path, exist_ok=True)
+            writer = self.png_writer(path)
+        next(writer)
+
+        began = time.perf_counter()
+        try:
+            for i, race_time in enumerate(times):
+                writer.send(self.render(race_time))
+                if (i + 1) % (self.fps * 10) == 0:
+                    elapsed = time.perf_counter() - began
+                    print(f"{i + 1}/{len(times)} frames, {(i + 1) / elapsed:.0f} fps, {race_time - start:.0f}s of race in {elapsed:.0f}s")
+        finally:
+            writer.close()
+        elapsed = time.perf_counter() - began
+        print(f"Exported {len(times)} frames in {elapsed:.1f}s ({(times[-1] - start if len(times) else 0) / max(elapsed, 1e-9):.1f}x real time)")
+
+    def png_writer(self, directory):
+        width, height = self.size
+        i = 0
+        while True:
+            pixels = yield
+            image = np.frombuffer(pixels, dtype=np.uint8).reshape(height, width, 3)[::-1]
+            # Fast compression, the PNG encoder would otherwise dominate the export
+            Image.fromarray(image).save(os.path.join(directory, f"frame_{i:06d}.png"), compress_level=1)
+            i += 1
+
+    def video_writer(self, path):
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg is needed to export a video, export to a directory for a PNG sequence")
+        width, height = self.size
+        process = subprocess.Popen([ffmpeg, "-y", "-loglevel", "error",
+                                    "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(self.fps), "-i", "-",
+                                    "-vf", "vflip", "-c:v", "libx264", "-pix_fmt", "yuv420p", path],
+                                   stdin=subprocess.PIPE)
+        try:
+            while True:
+                process.stdin.write((yield))
+        finally:
+            process.stdin.close()
+            process.wait()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export a race replay without a display")
+    parser.add_argument('session', help='Session to export, e.g. "France 2021 R"')
+    parser.add_argument('output', help='Video file (.mp4, .mkv, .mov, .webm) or directory for a PNG sequence')
+    parser.add_argument('--fps', type=int, default=30, help='Frames per second of the export')
+    parser.add_argument('--speed', type=float, default=1.0, help='Seconds of race per second of video')
+    parser.add_argument('--start', type=float, default=0.0, help='Race time of the first frame, in seconds')
+    parser.add_argument('--end', type=float, default=None, help='Race time of the last frame, in seconds')
+
+    args = parser.parse_args()
+    replay = RaceReplay(*ScheduleDataManager().resolve(args.session), run=False)
+    ReplayExporter(replay, args.fps, args.speed).export(args.output, args.start, args.end)
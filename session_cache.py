@@ -0,0 +1,96 @@
+import os
+import json
+import numpy as np
+
+
+CACHE_DIRECTORY = "cache"
+
+
+def save_json(path, data):
+    """Atomic write, a reader never sees a partial file"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def schedule_path(year, directory=CACHE_DIRECTORY):
+    return os.path.join(directory, "schedules", f"{year}.json")
+
+
+class SessionCache:
+    """Processed session stored on disk, one .npy file per array so it can be reloaded memory-mapped.
+
+    Layout of a session directory:
+        meta.json                    event name, date, rotation, drivers codes, total laps
+        track_<lap_type>.npy         (N, 2) track layout
+        drivers/<code>/<name>.npy    telemetry channels and lap index of one driver
+        timeline/<name>.npy          running order, gaps and intervals on a fixed time grid
+        geometry/<name>.npy          resampled centreline of the circuit
+    """
+    VERSION = 1
+
+    def __init__(self, year, session_number, session_type, directory=CACHE_DIRECTORY):
+        self.key = (year, session_number, session_type)
+        self.path = os.path.join(directory, f"{year}_{session_number}_{session_type}")
+
+    @property
+    def meta_path(self):
+        return os.path.join(self.path, "meta.json")
+
+    def exists(self):
+        if not os.path.exists(self.meta_path):
+            return False
+        return self.load_meta().get('version') == self.VERSION
+
+    def invalidate(self):
+        """Mark the session as not cached, it is processed again on the next load"""
+        if os.path.exists(self.meta_path):
+            os.remove(self.meta_path)
+
+    def track_path(self, lap_type):
+        return os.path.join(self.path, f"track_{lap_type}.npy")
+
+    def driver_path(self, code):
+        return os.path.join(self.path, "drivers", code)
+
+    @property
+    def geometry_path(self):
+        return os.path.join(self.path, "geometry")
+
+    @property
+    def timeline_path(self):
+        return os.path.join(self.path, "timeline")
+
+    def save_meta(self, meta):
+        # meta.json is written last and atomically, it marks the cache as complete
+        save_json(self.meta_path, {'version': self.VERSION, **meta})
+
+    def load_meta(self):
+        return load_json(self.meta_path)
+
+    def save_track(self, lap_type, points):
+        os.makedirs(self.path, exist_ok=True)
+        np.save(self.track_path(lap_type), np.asarray(points, dtype=np.float64))
+
+    def load_track(self, lap_type, mmap_mode='r'):
+        path = self.track_path(lap_type)
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode=mmap_mode)
+
+    @staticmethod
+    def save_arrays(directory, arrays):
+        os.makedirs(directory, exist_ok=True)
+        for name, values in arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), values)
+
+    @staticmethod
+    def load_arrays(directory, names, mmap_mode='r'):
+        return {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode) for name in names}